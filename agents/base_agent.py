@@ -1,14 +1,31 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, TypedDict
+from typing import Dict, Any, List, TypedDict, Callable, Awaitable, Optional
+from collections import OrderedDict
+from functools import lru_cache
 from langchain_groq import ChatGroq
 from pydantic import BaseModel
 import os
-import pandas as pd
 from dotenv import load_dotenv
 from datetime import datetime
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import threading
 
 load_dotenv()
 
+# Upper bound on in-flight LLM requests per agent to respect Groq rate limits
+MAX_CONCURRENT_LLM_CALLS = 8
+
+# Article text sent to per-article LLM calls is cut to this many characters
+MAX_ANALYSIS_CHARS = 1200
+
+# LLM responses memoized across agents and runs, keyed on (model, task, text hash)
+RESPONSE_CACHE_SIZE = 1024
+_response_cache: "OrderedDict[tuple, str]" = OrderedDict()
+# Agents run on several threads at once (parallel workflow stages, Streamlit sessions)
+_response_cache_lock = threading.Lock()
+
 # Use TypedDict for LangGraph compatibility
 class AgentState(TypedDict):
     messages: List[Dict[str, Any]]
@@ -19,29 +36,89 @@ class AgentState(TypedDict):
     final_report: str
     next_agent: str
 
+@lru_cache(maxsize=None)
+def _get_chat_groq(model: str, api_key: Optional[str]) -> ChatGroq:
+    """One ChatGroq client, and so one connection pool, per model shared by all agents"""
+    return ChatGroq(model=model, groq_api_key=api_key)
+
+def truncate(text: str, limit: int) -> str:
+    """Cut text to limit characters, marking the cut with an ellipsis"""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+# Immutable defaults for AgentState; list/dict fields are created per call
+_DEFAULT_STATE_SCALARS = {
+    "current_agent": "",
+    "topic": "",
+    "final_report": "",
+    "next_agent": ""
+}
+
 class BaseAgent(ABC):
-    def __init__(self, name: str, description: str):
+    def __init__(self, name: str, description: str, model: str = "llama-3.1-8b-instant",
+                 max_tokens: int = 256, temperature: float = 0.1):
         self.name = name
         self.description = description
+        self.model = model
         try:
-            self.llm = ChatGroq(
-                model="gemma2-9b-it",
-                temperature=0.1,
-                groq_api_key=os.getenv("GROQ_API_KEY")
+            # Per-agent sampling settings are bound onto the shared client
+            self.llm = _get_chat_groq(model, os.getenv("GROQ_API_KEY")).bind(
+                temperature=temperature,
+                max_tokens=max_tokens
             )
         except Exception as e:
             print(f"Warning: Could not initialize Groq LLM for {name}: {e}")
             self.llm = None
     
-    def execute_with_state_check(self, state: Any) -> AgentState:
-        """Execute with proper state structure validation"""
+    def execute_with_state_check(self, state: Any, **options) -> AgentState:
+        """Execute with proper state structure validation; options are passed on to execute"""
         validated_state = self.ensure_state_structure(state)
-        return self.execute(validated_state)
+        return self.execute(validated_state, **options)
     
     @abstractmethod
     def execute(self, state: AgentState) -> AgentState:
         pass
     
+    def run_concurrently(self, func: Callable[[Any], Awaitable[Any]], items: List[Any]) -> List[Any]:
+        """Run an async function over items concurrently and return results in order"""
+        async def _gather():
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+            
+            async def _bounded(item):
+                async with semaphore:
+                    return await func(item)
+            
+            return await asyncio.gather(*[_bounded(item) for item in items])
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(_gather())
+        # Called from inside a running event loop (Jupyter, an async caller),
+        # where asyncio.run is not allowed; run a fresh loop on a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, _gather()).result()
+    
+    def _response_key(self, task: str, text: str) -> tuple:
+        return (self.model, task, hashlib.blake2b(text.encode(), digest_size=16).hexdigest())
+    
+    def get_cached_response(self, task: str, text: str) -> Optional[str]:
+        """Return the memoized LLM response for this task and text, if any"""
+        key = self._response_key(task, text)
+        with _response_cache_lock:
+            content = _response_cache.get(key)
+            if content is not None:
+                _response_cache.move_to_end(key)
+        return content
+    
+    def cache_response(self, task: str, text: str, content: str) -> None:
+        """Memoize an LLM response, evicting the least recently used entry when full"""
+        key = self._response_key(task, text)
+        with _response_cache_lock:
+            _response_cache[key] = content
+            _response_cache.move_to_end(key)
+            if len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+    
     def format_message(self, content: str, agent_name: str = None) -> Dict[str, Any]:
         return {
             "agent": agent_name or self.name,
@@ -52,31 +129,21 @@ class BaseAgent(ABC):
     def ensure_state_structure(self, state: Any) -> AgentState:
         """Ensure the state has the correct structure for AgentState"""
         if isinstance(state, dict):
-            # Initialize missing keys with default values
-            default_state = {
+            # Single dict merge: defaults fill in only the keys the state lacks.
+            # Container defaults are fresh literals so states never share them.
+            return {
                 "messages": [],
-                "current_agent": "",
-                "topic": "",
                 "news_articles": [],
                 "analysis_results": {},
-                "final_report": "",
-                "next_agent": ""
+                **_DEFAULT_STATE_SCALARS,
+                **state
             }
-            
-            # Update with existing state values
-            for key, default_value in default_state.items():
-                if key not in state:
-                    state[key] = default_value
-            
-            return state
         else:
             # Handle case where state is not a dict
             return {
                 "messages": [],
-                "current_agent": "",
-                "topic": str(getattr(state, 'topic', '')),
                 "news_articles": [],
                 "analysis_results": {},
-                "final_report": "",
-                "next_agent": ""
+                **_DEFAULT_STATE_SCALARS,
+                "topic": str(getattr(state, 'topic', ''))
             }
@@ -1,149 +1,303 @@
-from .base_agent import BaseAgent, AgentState
+from .base_agent import BaseAgent, AgentState, MAX_ANALYSIS_CHARS
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from typing import Dict
+from collections import Counter
 import json
 import re
 
+# Capitalized word runs treated as potential named entities
+_ENTITY_RE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+
+# Articles classified per batched request; small batches keep each response
+# short and parseable while the batches themselves run concurrently
+SENTIMENT_BATCH_SIZE = 4
+
 class ContentAnalyzerAgent(BaseAgent):
     def __init__(self):
         super().__init__(
             name="ContentAnalyzer",
-            description="Analyzes content sentiment and extracts key insights"
+            description="Analyzes content sentiment and extracts key insights",
+            # Classification is latency-bound; deterministic output keeps it cacheable
+            model="llama-3.1-8b-instant",
+            temperature=0
         )
+        # Prompts and chains are built once and reused for every article
+        self._sentiment_prompt = ChatPromptTemplate.from_messages([
+            ("system", "Classify the sentiment of the text as positive, negative or neutral. One word only."),
+            ("user", "{text}")
+        ])
+        self._batch_prompt = ChatPromptTemplate.from_messages([
+            ("system", "Classify each numbered text as positive, negative or neutral. "
+                       "Return only a JSON array of labels, one per text, in order."),
+            ("user", "{texts}")
+        ])
+        # The answer is a single word, so a small budget is enough to
+        # reach it before the stream is cut off
+        self._sentiment_chain = self._sentiment_prompt | self.llm.bind(max_tokens=32) \
+            if self.llm else None
+    
+    def _fallback_sentiment(self) -> dict:
+        """Fallback sentiment analysis when LLM is not available"""
+        return {
+            "sentiment": "neutral",
+            "confidence": 0.5,
+            "key_themes": ["general", "news"],
+            "emotional_tone": "neutral",
+            "summary": "Basic analysis without LLM"
+        }
+    
+    def _failed_sentiment(self) -> dict:
+        """Neutral result used when the LLM call fails"""
+        return {
+            "sentiment": "neutral",
+            "confidence": 0.5,
+            "key_themes": ["general"],
+            "emotional_tone": "neutral",
+            "summary": "Analysis failed"
+        }
+    
+    def _parse_sentiment(self, content: str) -> dict:
+        """Simple parsing of the LLM response"""
+        content = content.lower()
+        if "positive" in content:
+            sentiment = "positive"
+        elif "negative" in content:
+            sentiment = "negative"
+        else:
+            sentiment = "neutral"
+        
+        return {
+            "sentiment": sentiment,
+            "confidence": 0.7,
+            "key_themes": ["general", "news"],
+            "emotional_tone": sentiment,
+            "summary": f"Sentiment analysis complete: {sentiment}"
+        }
+    
+    def _is_decisive(self, content: str) -> bool:
+        """Whether the partial response already names a sentiment label"""
+        lowered = content.lower()
+        return any(label in lowered for label in SENTIMENT_LABELS)
     
     def analyze_sentiment(self, text: str) -> dict:
         """Analyze sentiment of given text"""
         if not self.llm:
-            # Fallback sentiment analysis when LLM is not available
-            return {
-                "sentiment": "neutral",
-                "confidence": 0.5,
-                "key_themes": ["general", "news"],
-                "emotional_tone": "neutral",
-                "summary": "Basic analysis without LLM"
-            }
+            return self._fallback_sentiment()
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Analyze the sentiment and key themes of the given text.
-            Return a JSON object with:
-            - sentiment: positive/negative/neutral
-            - confidence: 0.0-1.0
-            - key_themes: list of main themes
-            - emotional_tone: description of emotional tone
-            - summary: brief summary"""),
-            ("user", "Text to analyze: {text}")
-        ])
+        text = text[:MAX_ANALYSIS_CHARS]
+        cached = self.get_cached_response("sentiment", text)
+        if cached is not None:
+            return self._parse_sentiment(cached)
         
         try:
-            # Use basic string parsing instead of JsonOutputParser for better reliability
-            chain = prompt | self.llm
-            result = chain.invoke({"text": text})
+            # Use basic string parsing instead of JsonOutputParser for better reliability,
+            # and stop streaming as soon as the label has been generated
+            content = ""
+            for chunk in self._sentiment_chain.stream({"text": text}):
+                content += chunk.content
+                if self._is_decisive(content):
+                    break
             
-            # Simple parsing of the response
-            content = result.content.lower()
-            if "positive" in content:
-                sentiment = "positive"
-            elif "negative" in content:
-                sentiment = "negative"
-            else:
-                sentiment = "neutral"
+            self.cache_response("sentiment", text, content)
+            return self._parse_sentiment(content)
+        except Exception as e:
+            print(f"Sentiment analysis failed: {e}")
+            return self._failed_sentiment()
+    
+    async def analyze_sentiment_async(self, text: str) -> dict:
+        """Async variant of analyze_sentiment so articles can be analyzed concurrently"""
+        if not self.llm:
+            return self._fallback_sentiment()
+        
+        text = text[:MAX_ANALYSIS_CHARS]
+        cached = self.get_cached_response("sentiment", text)
+        if cached is not None:
+            return self._parse_sentiment(cached)
+        
+        try:
+            content = ""
+            async for chunk in self._sentiment_chain.astream({"text": text}):
+                content += chunk.content
+                if self._is_decisive(content):
+                    break
             
-            return {
-                "sentiment": sentiment,
-                "confidence": 0.7,
-                "key_themes": ["general", "news"],
-                "emotional_tone": sentiment,
-                "summary": f"Sentiment analysis complete: {sentiment}"
-            }
+            self.cache_response("sentiment", text, content)
+            return self._parse_sentiment(content)
         except Exception as e:
             print(f"Sentiment analysis failed: {e}")
-            return {
-                "sentiment": "neutral",
-                "confidence": 0.5,
-                "key_themes": ["general"],
-                "emotional_tone": "neutral",
-                "summary": "Analysis failed"
-            }
+            return self._failed_sentiment()
+    
+    def _pending_sentiments(self, texts: list) -> tuple:
+        """Memoized labels (None if missing) for the texts and the truncated texts still to classify"""
+        # Keyed on the same truncated text as analyze_sentiment so both paths
+        # share entries
+        texts = [text[:MAX_ANALYSIS_CHARS] for text in texts]
+        labels = [self.get_cached_response("sentiment", text) for text in texts]
+        pending = [text for text, label in zip(texts, labels) if label is None]
+        return labels, pending
+    
+    def _batch_inputs(self, pending: list) -> tuple:
+        """Chain and prompt inputs for classifying the pending texts in one request"""
+        # The token budget depends on the batch size, so only the prompt is prebuilt
+        chain = self._batch_prompt | self.llm.bind(max_tokens=8 * len(pending), temperature=0)
+        numbered_texts = "\n".join(f"{i}: {text[:500]}" for i, text in enumerate(pending))
+        return chain, {"texts": numbered_texts}
+    
+    def _merge_batch_labels(self, labels: list, pending: list, content: str) -> list:
+        """Parse a batched response, memoize the new labels and return analyses in input order"""
+        match = _JSON_ARRAY_RE.search(content)
+        new_labels = [str(label).strip().lower() for label in json.loads(match.group(0))]
+        if len(new_labels) != len(pending) or any(label not in SENTIMENT_LABELS for label in new_labels):
+            raise ValueError(f"expected {len(pending)} sentiment labels, got {new_labels}")
+        
+        for text, label in zip(pending, new_labels):
+            self.cache_response("sentiment", text, label)
+        
+        new_labels = iter(new_labels)
+        return [self._parse_sentiment(label if label is not None else next(new_labels)) for label in labels]
+    
+    def classify_sentiments(self, texts: list) -> list:
+        """Classify all texts with a single batched LLM call.
+        
+        Returns None when the batch can't be classified so callers can fall
+        back to per-article analysis.
+        """
+        if not self.llm or not texts:
+            return None
+        
+        labels, pending = self._pending_sentiments(texts)
+        if not pending:
+            return [self._parse_sentiment(label) for label in labels]
+        
+        try:
+            chain, inputs = self._batch_inputs(pending)
+            return self._merge_batch_labels(labels, pending, chain.invoke(inputs).content)
+        except Exception as e:
+            print(f"Batched sentiment classification failed: {e}")
+            return None
+    
+    async def classify_sentiments_async(self, texts: list) -> list:
+        """Async variant of classify_sentiments so batches can be classified concurrently"""
+        if not self.llm or not texts:
+            return None
+        
+        labels, pending = self._pending_sentiments(texts)
+        if not pending:
+            return [self._parse_sentiment(label) for label in labels]
+        
+        try:
+            chain, inputs = self._batch_inputs(pending)
+            response = await chain.ainvoke(inputs)
+            return self._merge_batch_labels(labels, pending, response.content)
+        except Exception as e:
+            print(f"Batched sentiment classification failed: {e}")
+            return None
+    
+    def classify_in_batches(self, texts: list) -> list:
+        """Classify texts in concurrent batches of SENTIMENT_BATCH_SIZE.
+        
+        Texts of batches that can't be classified are analyzed one by one,
+        also concurrently.
+        """
+        batches = [texts[i:i + SENTIMENT_BATCH_SIZE] for i in range(0, len(texts), SENTIMENT_BATCH_SIZE)]
+        batch_analyses = self.run_concurrently(self.classify_sentiments_async, batches)
+        
+        failed = [text for batch, analyses in zip(batches, batch_analyses) if analyses is None for text in batch]
+        fallbacks = iter(self.run_concurrently(self.analyze_sentiment_async, failed) if failed else ())
+        
+        sentiment_analyses = []
+        for batch, analyses in zip(batches, batch_analyses):
+            sentiment_analyses.extend(analyses if analyses is not None else (next(fallbacks) for _ in batch))
+        return sentiment_analyses
     
     def extract_entities(self, text: str) -> list:
         """Extract named entities from text"""
         try:
-            # Simple entity extraction using regex patterns
-            entities = []
-            
-            # Extract capitalized words as potential entities
-            potential_entities = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', text)
-            entities.extend(potential_entities[:10])  # Limit to 10
+            # Simple entity extraction using regex patterns:
+            # capitalized words as potential entities, limited to 10
+            potential_entities = _ENTITY_RE.findall(text)
             
-            return list(set(entities))
+            # dict.fromkeys dedupes while keeping first-seen order
+            return list(dict.fromkeys(potential_entities[:10]))
         except Exception as e:
             print(f"Entity extraction failed: {e}")
             return []
     
-    def execute(self, state: AgentState) -> AgentState:
-        # Ensure state has proper structure
-        state = self.ensure_state_structure(state)
-        
+    def execute(self, state: AgentState, include_sentiment: bool = True) -> AgentState:
+        """Analyze the articles; without include_sentiment no LLM calls are made"""
         if not state["news_articles"]:
             state["current_agent"] = self.name
             state["messages"].append(self.format_message("No articles to analyze"))
             return state
         
-        analysis_results = {
-            "overall_sentiment": {"positive": 0, "negative": 0, "neutral": 0},
-            "article_analyses": [],
-            "key_themes": {},
-            "entities": [],
-            "summary_insights": ""
-        }
+        articles = state["news_articles"]
+        texts = [
+            f"{article.get('title', '')}. {article.get('content', '')}"
+            for article in articles
+        ]
         
-        for article in state["news_articles"]:
-            content = article.get("content", "")
-            title = article.get("title", "")
-            full_text = f"{title}. {content}"
-            
-            # Analyze sentiment
-            sentiment_analysis = self.analyze_sentiment(full_text)
-            
+        # Classify articles a few per request, with the requests in flight at
+        # once; per-article analysis covers batches whose response can't be parsed
+        sentiment_analyses = self.classify_in_batches(texts) if include_sentiment else [{} for _ in texts]
+        
+        # Aggregate into locals and assemble analysis_results afterwards
+        article_analyses = [None] * len(articles)
+        key_themes = Counter()
+        # Ordered set of unique entities across articles, capped at 15
+        unique_entities: Dict[str, None] = {}
+        
+        for i, (article, full_text, sentiment_analysis) in enumerate(zip(articles, texts, sentiment_analyses)):
             # Extract entities
             entities = self.extract_entities(full_text)
             
-            article_analysis = {
-                "title": title,
+            article_analyses[i] = {
+                "title": article.get("title", ""),
                 "url": article.get("url", ""),
                 "sentiment": sentiment_analysis,
                 "entities": entities
             }
             
-            analysis_results["article_analyses"].append(article_analysis)
-            
-            # Aggregate sentiment
-            sentiment = sentiment_analysis.get("sentiment", "neutral")
-            analysis_results["overall_sentiment"][sentiment] += 1
-            
             # Aggregate themes
-            for theme in sentiment_analysis.get("key_themes", []):
-                analysis_results["key_themes"][theme] = analysis_results["key_themes"].get(theme, 0) + 1
+            key_themes.update(sentiment_analysis.get("key_themes", []))
             
             # Aggregate entities
-            analysis_results["entities"].extend(entities)
+            for entity in entities:
+                if len(unique_entities) >= 15:
+                    break
+                unique_entities.setdefault(entity, None)
         
-        # Remove duplicate entities and keep top 15
-        analysis_results["entities"] = list(set(analysis_results["entities"]))[:15]
+        entities = list(unique_entities)
         
         # Generate summary insights
-        total_articles = len(state["news_articles"])
-        dominant_sentiment = max(analysis_results["overall_sentiment"], 
-                               key=analysis_results["overall_sentiment"].get)
-        top_themes = sorted(analysis_results["key_themes"].items(), 
-                          key=lambda x: x[1], reverse=True)[:5]
-        
-        summary = f"Analyzed {total_articles} articles. Overall sentiment: {dominant_sentiment}. "
-        summary += f"Top themes: {', '.join([theme for theme, count in top_themes])}. "
-        summary += f"Key entities identified: {len(analysis_results['entities'])}"
+        total_articles = len(articles)
+        top_themes = key_themes.most_common(5)
         
-        analysis_results["summary_insights"] = summary
+        summary = f"Analyzed {total_articles} articles. "
+        analysis_results = {}
+        if include_sentiment:
+            # Aggregate sentiment with one C-level count per label
+            labels = [analysis.get("sentiment", "neutral") for analysis in sentiment_analyses]
+            sentiment_counts = {label: labels.count(label) for label in SENTIMENT_LABELS}
+            dominant_sentiment = max(sentiment_counts, key=sentiment_counts.get)
+            summary += f"Overall sentiment: {dominant_sentiment}. "
+            analysis_results["overall_sentiment"] = sentiment_counts
+            # Computed once here so readers don't each rescan the counts
+            analysis_results["dominant_sentiment"] = dominant_sentiment
+        # Themes come from the sentiment analyses, so there are none when it is off
+        if top_themes:
+            summary += f"Top themes: {', '.join([theme for theme, count in top_themes])}. "
+        summary += f"Key entities identified: {len(entities)}"
         
+        analysis_results.update({
+            "article_analyses": article_analyses,
+            "key_themes": key_themes,
+            "entities": entities,
+            "summary_insights": summary
+        })
         state["analysis_results"] = analysis_results
         state["current_agent"] = self.name
         
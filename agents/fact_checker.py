@@ -1,129 +1,183 @@
-from .base_agent import BaseAgent, AgentState
+from .base_agent import BaseAgent, AgentState, MAX_ANALYSIS_CHARS
 from langchain_core.prompts import ChatPromptTemplate
+from collections import Counter
 import re
 
+_SENSATIONAL_WORDS = frozenset({"shocking", "unbelievable", "incredible", "amazing", "devastating"})
+_ABSOLUTE_WORDS = frozenset({"always", "never", "all", "none", "everyone", "nobody"})
+
+_KEYWORD_CATEGORIES = {"sensational": _SENSATIONAL_WORDS, "absolute": _ABSOLUTE_WORDS}
+
+def _keyword_scanner(categories: dict) -> "re.Pattern":
+    """Compile one whole-word pattern with a named group per keyword category"""
+    groups = (
+        f"(?P<{category}>" + "|".join(sorted(map(re.escape, words))) + ")"
+        for category, words in categories.items()
+    )
+    return re.compile(r"\b(?:" + "|".join(groups) + r")\b")
+
+# A single pass over the text finds the keywords of every category at once
+_KEYWORD_RE = _keyword_scanner(_KEYWORD_CATEGORIES)
+
+# Terms in the LLM assessment that lower or raise the credibility score
+_LOW_CREDIBILITY_TERMS = ("unreliable", "false", "misleading", "biased")
+_HIGH_CREDIBILITY_TERMS = ("credible", "accurate", "verified", "reliable")
+
 class FactCheckerAgent(BaseAgent):
     def __init__(self):
         super().__init__(
             name="FactChecker",
-            description="Verifies factual accuracy and identifies potential misinformation"
+            description="Verifies factual accuracy and identifies potential misinformation",
+            model="llama-3.3-70b-specdec",
+            temperature=0
         )
-    
-    def check_claims(self, text: str) -> dict:
-        """Check factual claims in the text"""
-        if not self.llm:
-            # Fallback when LLM is not available
-            return {
-                "credibility_score": 0.7,
-                "assessment": "LLM not available for fact checking",
-                "red_flags": self._identify_red_flags(text)
-            }
-        
-        prompt = ChatPromptTemplate.from_messages([
+        # Built once and reused for every article
+        self._fact_check_prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a fact-checker. Analyze the text for:
             1. Factual claims that can be verified
             2. Potential misinformation or bias
             3. Sources credibility
             4. Consistency of information
             
-            Return assessment of reliability and any red flags."""),
+            Return a brief assessment of reliability and any red flags."""),
             ("user", "Text to fact-check: {text}")
         ])
+        # Capped response length; the assessment only needs to be brief
+        self._fact_check_chain = self._fact_check_prompt | self.llm.bind(max_tokens=128) \
+            if self.llm else None
+    
+    def _score_assessment(self, assessment: str, text: str) -> dict:
+        """Derive a simple credibility score from the LLM assessment"""
+        credibility_score = 0.7  # Default moderate credibility
+        
+        lowered = assessment.lower()
+        if any(term in lowered for term in _LOW_CREDIBILITY_TERMS):
+            credibility_score = 0.3
+        elif any(term in lowered for term in _HIGH_CREDIBILITY_TERMS):
+            credibility_score = 0.8
+        
+        return {
+            "credibility_score": credibility_score,
+            "assessment": assessment,
+            "red_flags": self._identify_red_flags(text)
+        }
+    
+    def _fallback_check(self, text: str) -> dict:
+        """Fallback when LLM is not available"""
+        return {
+            "credibility_score": 0.7,
+            "assessment": "LLM not available for fact checking",
+            "red_flags": self._identify_red_flags(text)
+        }
+    
+    def _failed_check(self, text: str) -> dict:
+        """Result used when the LLM call fails"""
+        return {
+            "credibility_score": 0.5,
+            "assessment": "Fact checking failed",
+            "red_flags": self._identify_red_flags(text)
+        }
+    
+    def check_claims(self, text: str) -> dict:
+        """Check factual claims in the text"""
+        if not self.llm:
+            return self._fallback_check(text)
+        
+        # Red flags are still checked against the full text
+        prompt_text = text[:MAX_ANALYSIS_CHARS]
+        cached = self.get_cached_response("fact_check", prompt_text)
+        if cached is not None:
+            return self._score_assessment(cached, text)
         
         try:
-            chain = prompt | self.llm
-            response = chain.invoke({"text": text})
-            
-            # Simple credibility scoring
-            credibility_score = 0.7  # Default moderate credibility
-            
-            content = response.content.lower()
-            if any(word in content for word in ["unreliable", "false", "misleading", "biased"]):
-                credibility_score = 0.3
-            elif any(word in content for word in ["credible", "accurate", "verified", "reliable"]):
-                credibility_score = 0.8
-            
-            return {
-                "credibility_score": credibility_score,
-                "assessment": response.content,
-                "red_flags": self._identify_red_flags(text)
-            }
+            response = self._fact_check_chain.invoke({"text": prompt_text})
+            self.cache_response("fact_check", prompt_text, response.content)
+            return self._score_assessment(response.content, text)
         except Exception as e:
             print(f"Fact checking failed: {e}")
-            return {
-                "credibility_score": 0.5,
-                "assessment": "Fact checking failed",
-                "red_flags": self._identify_red_flags(text)
-            }
+            return self._failed_check(text)
+    
+    async def check_claims_async(self, text: str) -> dict:
+        """Async variant of check_claims so articles can be checked concurrently"""
+        if not self.llm:
+            return self._fallback_check(text)
+        
+        prompt_text = text[:MAX_ANALYSIS_CHARS]
+        cached = self.get_cached_response("fact_check", prompt_text)
+        if cached is not None:
+            return self._score_assessment(cached, text)
+        
+        try:
+            response = await self._fact_check_chain.ainvoke({"text": prompt_text})
+            self.cache_response("fact_check", prompt_text, response.content)
+            return self._score_assessment(response.content, text)
+        except Exception as e:
+            print(f"Fact checking failed: {e}")
+            return self._failed_check(text)
     
     def _identify_red_flags(self, text: str) -> list:
         """Identify potential red flags in the content"""
         red_flags = []
+        lowered = text.lower()
+        
+        # Collect the keyword categories present, stopping once all are seen
+        categories = set()
+        for match in _KEYWORD_RE.finditer(lowered):
+            categories.add(match.lastgroup)
+            if len(categories) == len(_KEYWORD_CATEGORIES):
+                break
         
         # Check for sensational language
-        sensational_words = ["shocking", "unbelievable", "incredible", "amazing", "devastating"]
-        if any(word in text.lower() for word in sensational_words):
+        if "sensational" in categories:
             red_flags.append("Contains sensational language")
         
         # Check for lack of sources
-        if "source" not in text.lower() and "according to" not in text.lower():
+        if "source" not in lowered and "according to" not in lowered:
             red_flags.append("Limited source attribution")
         
         # Check for absolute statements
-        absolute_words = ["always", "never", "all", "none", "everyone", "nobody"]
-        if any(word in text.lower() for word in absolute_words):
+        if "absolute" in categories:
             red_flags.append("Contains absolute statements")
         
         return red_flags
     
     def execute(self, state: AgentState) -> AgentState:
-        # Ensure state has proper structure
-        state = self.ensure_state_structure(state)
-        
         if not state["news_articles"]:
             state["current_agent"] = self.name
             state["messages"].append(self.format_message("No articles to fact-check"))
             return state
         
-        fact_check_results = {
-            "overall_credibility": 0.0,
-            "article_assessments": [],
-            "common_red_flags": {},
-            "reliability_summary": ""
-        }
+        articles = state["news_articles"]
+        texts = [
+            f"{article.get('title', '')}. {article.get('content', '')}"
+            for article in articles
+        ]
+        
+        # Fact-check all articles concurrently
+        fact_checks = self.run_concurrently(self.check_claims_async, texts)
         
+        # Aggregate into locals and assemble the results afterwards
+        article_assessments = [None] * len(articles)
+        common_red_flags = Counter()
         total_credibility = 0
         
-        for article in state["news_articles"]:
-            content = article.get("content", "")
-            title = article.get("title", "")
-            full_text = f"{title}. {content}"
-            
-            # Fact-check the article
-            fact_check = self.check_claims(full_text)
-            
-            article_assessment = {
-                "title": title,
+        for i, (article, fact_check) in enumerate(zip(articles, fact_checks)):
+            article_assessments[i] = {
+                "title": article.get("title", ""),
                 "url": article.get("url", ""),
                 "credibility_score": fact_check["credibility_score"],
                 "assessment": fact_check["assessment"],
                 "red_flags": fact_check["red_flags"]
             }
-            
-            fact_check_results["article_assessments"].append(article_assessment)
             total_credibility += fact_check["credibility_score"]
             
             # Aggregate red flags
-            for flag in fact_check["red_flags"]:
-                fact_check_results["common_red_flags"][flag] = \
-                    fact_check_results["common_red_flags"].get(flag, 0) + 1
+            common_red_flags.update(fact_check["red_flags"])
         
         # Calculate overall credibility
-        if state["news_articles"]:
-            fact_check_results["overall_credibility"] = total_credibility / len(state["news_articles"])
+        credibility = total_credibility / len(articles)
         
         # Generate reliability summary
-        credibility = fact_check_results["overall_credibility"]
         if credibility >= 0.7:
             reliability_level = "High"
         elif credibility >= 0.5:
@@ -131,19 +185,21 @@ class FactCheckerAgent(BaseAgent):
         else:
             reliability_level = "Low"
         
-        common_flags = sorted(fact_check_results["common_red_flags"].items(), 
-                            key=lambda x: x[1], reverse=True)[:3]
+        common_flags = common_red_flags.most_common(3)
         
         summary = f"Overall reliability: {reliability_level} (Score: {credibility:.2f}). "
         if common_flags:
             summary += f"Common issues: {', '.join([flag for flag, count in common_flags])}"
         
-        fact_check_results["reliability_summary"] = summary
-        
         # Add fact-check results to analysis results
         if not state["analysis_results"]:
             state["analysis_results"] = {}
-        state["analysis_results"]["fact_check"] = fact_check_results
+        state["analysis_results"]["fact_check"] = {
+            "overall_credibility": credibility,
+            "article_assessments": article_assessments,
+            "common_red_flags": common_red_flags,
+            "reliability_summary": summary
+        }
         
         state["current_agent"] = self.name
         
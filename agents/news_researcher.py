@@ -1,32 +1,196 @@
-from .base_agent import BaseAgent, AgentState
+from .base_agent import BaseAgent, AgentState, truncate
 from langchain_core.prompts import ChatPromptTemplate
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from importlib.util import find_spec
+from functools import lru_cache
+from typing import Optional
+from collections import OrderedDict
+import threading
+import time
+import math
 import os
+import re
+
+# newspaper (lxml, nltk, Pillow) and tavily are slow to import, so only check
+# they are installed here and import them on first use
+NEWSPAPER_AVAILABLE = find_spec("newspaper") is not None
+TAVILY_AVAILABLE = find_spec("tavily") is not None
 
-# Try importing newspaper with error handling
 try:
-    from newspaper import Article
-    NEWSPAPER_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: newspaper library not available: {e}")
-    NEWSPAPER_AVAILABLE = False
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+# Extracted articles persist here across runs, keyed by canonical URL
+ARTICLE_CACHE_DIR = os.path.join(".cache", "articles")
+ARTICLE_CACHE_SIZE_LIMIT = 1 << 30
+ARTICLE_CACHE_TTL = 24 * 60 * 60
+
+# Entries kept in memory when diskcache is unavailable; same TTL as on disk
+ARTICLE_MEMORY_CACHE_SIZE = 256
+
+@lru_cache(maxsize=None)
+def _get_disk_cache():
+    """Shared on-disk article cache, or None when diskcache is unavailable"""
+    if not DISKCACHE_AVAILABLE:
+        return None
+    try:
+        return diskcache.Cache(ARTICLE_CACHE_DIR, size_limit=ARTICLE_CACHE_SIZE_LIMIT)
+    except Exception as e:
+        print(f"Warning: article disk cache unavailable: {e}")
+        return None
+
+@lru_cache(maxsize=None)
+def _get_article_cls():
+    """newspaper's Article class, or None if the library can't be imported"""
+    if not NEWSPAPER_AVAILABLE:
+        return None
+    try:
+        from newspaper import Article
+        return Article
+    except ImportError as e:
+        print(f"Warning: newspaper library not available: {e}")
+        return None
+
+@lru_cache(maxsize=None)
+def _get_tavily_client_cls():
+    """tavily's TavilyClient class, or None if the library can't be imported"""
+    if not TAVILY_AVAILABLE:
+        return None
+    try:
+        from tavily import TavilyClient
+        return TavilyClient
+    except ImportError as e:
+        print(f"Warning: tavily library not available: {e}")
+        return None
+
+# Search results requested per query, and queries run, when the caller sets no article limit
+RESULTS_PER_QUERY = 3
+DEFAULT_QUERY_COUNT = 2
+
+# Thread pool size for overlapping blocking page downloads
+MAX_FETCH_WORKERS = 16
+
+# Largest page body read per article, bounds memory on pathological pages
+MAX_PAGE_BYTES = 512_000
+
+# Page bodies are read in chunks of this size so the download can stop at the cap
+PAGE_CHUNK_BYTES = 64 * 1024
+
+# Extracted article bodies are cut to this many characters before entering state
+MAX_ARTICLE_CHARS = 1000
+
+# (connect, read) timeouts for page fetches; fail fast on unreachable hosts
+REQUEST_TIMEOUT = (3.05, 10)
+
+def _build_session() -> requests.Session:
+    """Build the pooled, retrying session shared by all page fetches"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=2, backoff_factor=0.3)
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    return session
+
+# Common article containers in priority order; built once rather than per page
+_ARTICLE_SELECTORS = (
+    'article', '[class*="article"]', '[class*="content"]',
+    '[class*="story"]', '[class*="post"]', 'main', '.entry-content'
+)
+
+# Container text shorter than this is likely a teaser or nav block, so the
+# page's paragraphs are tried instead
+MIN_CONTAINER_CHARS = 200
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Shared session so concurrent fetches reuse pooled keep-alive connections
+_SESSION = _build_session()
+
+# Query parameters that only track the click and never change the page
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+def _canonicalize(url: str) -> str:
+    """Normalize a URL so the same article reached via different links compares equal"""
+    parts = urlsplit(url.strip())
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    ])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), query, ""))
+
+# Spaces become hyphens and punctuation is dropped, in a single translate pass
+_SLUG_TABLE = str.maketrans({' ': '-', ',': None, '.': None, '?': None, '!': None, "'": None, '"': None})
+
+def _slugify(text: str) -> str:
+    """URL path segment for a free-text query"""
+    return text.translate(_SLUG_TABLE).lower()
+
+# Mock results used when no search API is configured; {query} and {slug} are
+# filled in per search
+_MOCK_ARTICLE_TEMPLATES = (
+    {
+        "title": "Breaking: Major Developments in {query} Reshape Industry Landscape",
+        "content": "Recent developments in {query} have significant implications for multiple industries. Industry experts are closely monitoring these changes as they could potentially transform how businesses operate in the coming years. The new developments include technological advances, regulatory changes, and market shifts that are expected to have long-lasting effects. Companies are already beginning to adapt their strategies to capitalize on these emerging opportunities. Market analysts predict that these changes will drive innovation and create new business models across various sectors. The impact is expected to be particularly strong in technology, healthcare, and financial services sectors.",
+        "url": "https://www.reuters.com/technology/{slug}-developments-2024",
+        "publish_date": "2024-01-15"
+    },
+    {
+        "title": "Global Impact: How {query} is Transforming International Markets",
+        "content": "The global implications of recent {query} trends are becoming increasingly apparent as international markets respond to these changes. Economic analysts report significant shifts in investment patterns, with venture capital firms increasing their focus on {query}-related opportunities. The transformation is not limited to developed markets, as emerging economies are also experiencing substantial changes. Government policies are being adapted to address the challenges and opportunities presented by these developments. International trade relationships are evolving as countries position themselves to benefit from the {query} revolution. The ripple effects are being felt across supply chains, employment markets, and consumer behavior patterns worldwide.",
+        "url": "https://www.bbc.com/news/business/{slug}-global-impact-2024",
+        "publish_date": "2024-01-14"
+    },
+    {
+        "title": "Expert Analysis: The Future of {query} and Its Societal Implications",
+        "content": "Leading researchers and industry experts provide comprehensive analysis on the future trajectory of {query} and its potential impact on society. The consensus among experts is that we are witnessing a fundamental shift that will influence how we work, communicate, and interact with technology. Social implications include changes in employment patterns, educational requirements, and digital literacy needs. Privacy and security concerns are also at the forefront of discussions as stakeholders work to balance innovation with protection of individual rights. The analysis reveals both opportunities and challenges that society must address to ensure equitable access to the benefits of {query} advancement.",
+        "url": "https://www.cnn.com/tech/analysis/{slug}-future-implications",
+        "publish_date": "2024-01-13"
+    }
+)
 
 class NewsResearcherAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, use_llm_query_expansion: bool = False):
         super().__init__(
             name="NewsResearcher",
-            description="Searches and gathers relevant news articles using web scraping"
+            description="Searches and gathers relevant news articles using web scraping",
+            model="llama-3.1-8b-instant"
         )
         self.tavily_api_key = os.getenv("TAVILY_API_KEY")
+        # Built once so its HTTP session is reused across searches; tavily is
+        # only imported when a key is configured
+        tavily_client_cls = _get_tavily_client_cls() if self.tavily_api_key else None
+        self._tavily = tavily_client_cls(api_key=self.tavily_api_key) if tavily_client_cls else None
+        # Extracted articles by canonical URL with the time they were stored;
+        # only used without the disk cache, bounded and expired like it
+        self._article_cache = OrderedDict()
+        # Pages are extracted on the fetch pool's threads
+        self._article_cache_lock = threading.Lock()
+        # Template queries are nearly always what the LLM would suggest, so the
+        # extra round-trip to generate them is opt-in
+        self.use_llm_query_expansion = use_llm_query_expansion
+        # Built once for query expansion
+        self._query_prompt = ChatPromptTemplate.from_messages([
+            ("system", "You are a news researcher. Create search queries for the given topic."),
+            ("user", "Topic: {topic}\nGenerate 2-3 relevant search queries for news articles.")
+        ])
+        self._query_chain = self._query_prompt | self.llm if self.llm else None
     
     def search_news(self, query: str, max_results: int = 5) -> list:
         """Search for news articles using Tavily API or fallback methods"""
-        if self.tavily_api_key:
+        if self._tavily:
             try:
-                from tavily import TavilyClient
-                client = TavilyClient(api_key=self.tavily_api_key)
-                response = client.search(
+                response = self._tavily.search(
                     query=query,
                     search_depth="advanced",
                     max_results=max_results,
@@ -39,18 +203,149 @@ class NewsResearcherAgent(BaseAgent):
         else:
             return self._fallback_news_search(query, max_results)
     
+    def _search_query(self, query: str, max_results: int = RESULTS_PER_QUERY) -> list:
+        """Run a single search, swallowing errors so one failed query doesn't sink the batch"""
+        try:
+            return self.search_news(query, max_results=max_results)
+        except Exception as e:
+            print(f"Search failed for query '{query}': {e}")
+            return []
+    
+    def _needs_extraction(self, result: dict) -> bool:
+        """Whether a search result is a raw hit whose page still has to be scraped"""
+        # Fallback and already-extracted articles carry a publish_date; raw
+        # search hits only have a snippet
+        return "publish_date" not in result
+    
+    def _merge_extraction(self, hit: dict, article: dict) -> dict:
+        """Prefer the scraped article, keeping the search snippet when scraping failed"""
+        if article["title"] != "Failed to extract":
+            return article
+        return {
+            "title": hit.get("title", "Untitled"),
+            "content": hit.get("content", ""),
+            "url": hit.get("url", ""),
+            "publish_date": hit.get("published_date", "Unknown")
+        }
+    
+    def _search_and_fetch(self, queries: list, results_per_query: int = RESULTS_PER_QUERY) -> list:
+        """Run searches concurrently, scraping each query's hits as soon as its search returns"""
+        with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+            searches = {executor.submit(self._search_query, query, results_per_query): i
+                        for i, query in enumerate(queries)}
+            
+            # Pending extraction per canonical URL, so a page returned by
+            # several queries is downloaded once
+            extractions = {}
+            # Per query, each hit with its canonical URL and pending extraction
+            # (if any); kept in query order so results don't depend on search timing
+            slots = [[] for _ in queries]
+            for search in as_completed(searches):
+                slot = slots[searches[search]]
+                for hit in search.result():
+                    key = _canonicalize(hit.get("url", ""))
+                    extraction = None
+                    if self._needs_extraction(hit):
+                        extraction = extractions.get(key)
+                        if extraction is None:
+                            extraction = executor.submit(self._extract_article_content, hit.get("url", ""))
+                            extractions[key] = extraction
+                    slot.append((hit, key, extraction))
+            
+            articles = []
+            seen = set()
+            for slot in slots:
+                for hit, key, extraction in slot:
+                    if key:
+                        # Keep only the first occurrence in query order
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    articles.append(self._merge_extraction(hit, extraction.result()) if extraction else hit)
+            return articles
+    
+    def _cached_article(self, key: str):
+        """Earlier extraction of the page at key, or None if missing or expired"""
+        disk_cache = _get_disk_cache()
+        if disk_cache is not None:
+            return disk_cache.get(key)
+        with self._article_cache_lock:
+            entry = self._article_cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= ARTICLE_CACHE_TTL:
+                del self._article_cache[key]
+                return None
+            self._article_cache.move_to_end(key)
+            return entry[1]
+    
+    def _cache_article(self, key: str, article: dict) -> None:
+        """Store an extraction, evicting the least recently used entry when full"""
+        disk_cache = _get_disk_cache()
+        if disk_cache is not None:
+            disk_cache.set(key, article, expire=ARTICLE_CACHE_TTL)
+            return
+        with self._article_cache_lock:
+            self._article_cache[key] = (time.monotonic(), article)
+            self._article_cache.move_to_end(key)
+            if len(self._article_cache) > ARTICLE_MEMORY_CACHE_SIZE:
+                self._article_cache.popitem(last=False)
+    
     def _extract_article_content(self, url: str) -> dict:
+        """Extract article content, reusing earlier extractions of the same URL"""
+        key = _canonicalize(url)
+        cached = self._cached_article(key)
+        if cached is not None:
+            return dict(cached)
+        
+        article = self._scrape_article(url)
+        if article["title"] != "Failed to extract":
+            self._cache_article(key, article)
+        return dict(article)
+    
+    def _fetch_html(self, url: str) -> bytes:
+        """Download a page's raw HTML through the shared pooled session"""
+        # Stream so the body read can be capped
+        with _SESSION.get(url, timeout=REQUEST_TIMEOUT, stream=True) as response:
+            # Error pages would otherwise replace the search snippet
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(PAGE_CHUNK_BYTES):
+                chunks.append(chunk)
+                size += len(chunk)
+                # newspaper scores the whole DOM, so the page is only cut at the cap
+                if size >= MAX_PAGE_BYTES:
+                    break
+        return b"".join(chunks)[:MAX_PAGE_BYTES]
+    
+    def _failed_extraction(self, url: str) -> dict:
+        """Placeholder article for pages that could not be extracted"""
+        return {
+            "title": "Failed to extract",
+            "content": "Could not extract article content",
+            "url": url,
+            "publish_date": "Unknown"
+        }
+    
+    def _scrape_article(self, url: str) -> dict:
         """Extract article content with fallback methods"""
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+        # Downloaded once for both extractors; newspaper's own download would
+        # bypass the pooled session and repeat the fetch whenever it fails
+        try:
+            html = self._fetch_html(url)
+        except Exception:
+            return self._failed_extraction(url)
         
-        if NEWSPAPER_AVAILABLE:
+        Article = _get_article_cls()
+        if Article is not None:
             try:
                 article = Article(url)
-                article.download()
+                article.download(input_html=html)
                 article.parse()
                 return {
                     "title": article.title,
-                    "content": article.text[:1000] + "..." if len(article.text) > 1000 else article.text,
+                    "content": truncate(article.text, MAX_ARTICLE_CHARS),
                     "url": url,
                     "publish_date": str(article.publish_date) if article.publish_date else "Unknown"
                 }
@@ -59,122 +354,95 @@ class NewsResearcherAgent(BaseAgent):
         
         # Fallback to basic web scraping
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # C-backed parser; detects the encoding from the raw bytes
+            tree = LexborHTMLParser(html)
             
             # Try to extract title
             title = "Unknown Title"
-            title_tag = soup.find('title') or soup.find('h1')
+            title_tag = tree.css_first('title') or tree.css_first('h1')
             if title_tag:
-                title = title_tag.get_text().strip()
+                title = title_tag.text().strip()
+            
+            # Remove script and style elements
+            tree.strip_tags(["script", "style"])
             
             # Try to extract content from common article containers
             content = ""
-            article_selectors = [
-                'article', '[class*="article"]', '[class*="content"]',
-                '[class*="story"]', '[class*="post"]', 'main', '.entry-content'
-            ]
-            
-            for selector in article_selectors:
-                element = soup.select_one(selector)
+            for selector in _ARTICLE_SELECTORS:
+                element = tree.css_first(selector)
                 if element:
-                    # Remove script and style elements
-                    for script in element(["script", "style"]):
-                        script.decompose()
-                    content = element.get_text().strip()
+                    # One pass over the subtree; the separator keeps words in
+                    # adjacent nodes apart before whitespace is collapsed
+                    content = _WHITESPACE_RE.sub(' ', element.text(separator=' ')).strip()
                     break
             
-            if not content:
-                # Fallback to all paragraphs
-                paragraphs = soup.find_all('p')
-                content = ' '.join([p.get_text().strip() for p in paragraphs[:5]])
+            if len(content) < MIN_CONTAINER_CHARS:
+                # Fallback to the first paragraphs
+                paragraphs = ' '.join(p.text(separator=' ') for p in tree.css('p')[:5])
+                paragraphs = _WHITESPACE_RE.sub(' ', paragraphs).strip()
+                if len(paragraphs) > len(content):
+                    content = paragraphs
             
             return {
                 "title": title,
-                "content": content[:1000] + "..." if len(content) > 1000 else content,
+                "content": truncate(content, MAX_ARTICLE_CHARS),
                 "url": url,
                 "publish_date": "Unknown"
             }
         except Exception:
-            return {
-                "title": "Failed to extract",
-                "content": "Could not extract article content",
-                "url": url,
-                "publish_date": "Unknown"
-            }
+            return self._failed_extraction(url)
     
     def _fallback_news_search(self, query: str, max_results: int) -> list:
         """Fallback news search using web scraping"""
-        articles = []
+        # Enhanced mock articles with more content and real-looking URLs
+        fields = {"query": query, "slug": _slugify(query)}
+        return [
+            {key: value.format_map(fields) for key, value in template.items()}
+            for template in _MOCK_ARTICLE_TEMPLATES[:max_results]
+        ]
+    
+    def _template_queries(self, topic: str) -> list:
+        """Deterministic search queries for a topic"""
+        return [topic, f"{topic} latest news", f"{topic} analysis"]
+    
+    def _generate_queries(self, topic: str) -> list:
+        """Ask the LLM for search queries for a topic"""
         try:
-            # Enhanced mock articles with more content and real-looking URLs
-            mock_articles = [
-                {
-                    "title": f"Breaking: Major Developments in {query} Reshape Industry Landscape",
-                    "content": f"Recent developments in {query} have significant implications for multiple industries. Industry experts are closely monitoring these changes as they could potentially transform how businesses operate in the coming years. The new developments include technological advances, regulatory changes, and market shifts that are expected to have long-lasting effects. Companies are already beginning to adapt their strategies to capitalize on these emerging opportunities. Market analysts predict that these changes will drive innovation and create new business models across various sectors. The impact is expected to be particularly strong in technology, healthcare, and financial services sectors.",
-                    "url": f"https://www.reuters.com/technology/{query.replace(' ', '-').lower()}-developments-2024",
-                    "publish_date": "2024-01-15"
-                },
-                {
-                    "title": f"Global Impact: How {query} is Transforming International Markets",
-                    "content": f"The global implications of recent {query} trends are becoming increasingly apparent as international markets respond to these changes. Economic analysts report significant shifts in investment patterns, with venture capital firms increasing their focus on {query}-related opportunities. The transformation is not limited to developed markets, as emerging economies are also experiencing substantial changes. Government policies are being adapted to address the challenges and opportunities presented by these developments. International trade relationships are evolving as countries position themselves to benefit from the {query} revolution. The ripple effects are being felt across supply chains, employment markets, and consumer behavior patterns worldwide.",
-                    "url": f"https://www.bbc.com/news/business/{query.replace(' ', '-').lower()}-global-impact-2024",
-                    "publish_date": "2024-01-14"
-                },
-                {
-                    "title": f"Expert Analysis: The Future of {query} and Its Societal Implications",
-                    "content": f"Leading researchers and industry experts provide comprehensive analysis on the future trajectory of {query} and its potential impact on society. The consensus among experts is that we are witnessing a fundamental shift that will influence how we work, communicate, and interact with technology. Social implications include changes in employment patterns, educational requirements, and digital literacy needs. Privacy and security concerns are also at the forefront of discussions as stakeholders work to balance innovation with protection of individual rights. The analysis reveals both opportunities and challenges that society must address to ensure equitable access to the benefits of {query} advancement.",
-                    "url": f"https://www.cnn.com/tech/analysis/{query.replace(' ', '-').lower()}-future-implications",
-                    "publish_date": "2024-01-13"
-                }
-            ]
-            articles.extend(mock_articles[:max_results])
+            response = self._query_chain.invoke({"topic": topic})
+            
+            # Extract search queries from response
+            queries = [q.strip() for q in response.content.split('\n') if q.strip() and not q.startswith('-')]
+            queries = [q for q in queries if len(q) > 3]  # Filter out very short queries
+            
+            if not queries:
+                queries = [topic, f"{topic} news"]
             
+            return queries
         except Exception as e:
-            print(f"Fallback search failed: {e}")
-        
-        return articles
+            print(f"Query generation failed: {e}")
+            return [topic, f"{topic} news"]
     
-    def execute(self, state: AgentState) -> AgentState:
-        # Ensure state has proper structure
-        state = self.ensure_state_structure(state)
-        
-        if not self.llm:
-            # Fallback when LLM is not available
-            queries = [state["topic"], f"{state['topic']} news", f"{state['topic']} latest"]
+    def execute(self, state: AgentState, max_articles: Optional[int] = None) -> AgentState:
+        """Search and scrape news for the topic; max_articles caps the articles returned"""
+        topic = state["topic"]
+        if self.use_llm_query_expansion and self.llm:
+            queries = self._generate_queries(topic)
         else:
-            try:
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", "You are a news researcher. Create search queries for the given topic."),
-                    ("user", "Topic: {topic}\nGenerate 2-3 relevant search queries for news articles.")
-                ])
-                
-                chain = prompt | self.llm
-                response = chain.invoke({"topic": state["topic"]})
-                
-                # Extract search queries from response
-                queries = [q.strip() for q in response.content.split('\n') if q.strip() and not q.startswith('-')]
-                queries = [q for q in queries if len(q) > 3]  # Filter out very short queries
-                
-                if not queries:
-                    queries = [state["topic"], f"{state['topic']} news"]
-                    
-            except Exception as e:
-                print(f"Query generation failed: {e}")
-                queries = [state["topic"], f"{state['topic']} news"]
+            queries = self._template_queries(topic)
         
-        all_articles = []
-        for query in queries[:2]:  # Limit to 2 queries
-            try:
-                articles = self.search_news(query, max_results=3)
-                all_articles.extend(articles)
-            except Exception as e:
-                print(f"Search failed for query '{query}': {e}")
+        if max_articles is None:
+            all_articles = self._search_and_fetch(queries[:DEFAULT_QUERY_COUNT])
+        else:
+            # Searches are sized to the limit, so only about max_articles pages
+            # are scraped; duplicates across queries can leave fewer
+            queries = queries[:max(1, min(len(queries), math.ceil(max_articles / RESULTS_PER_QUERY)))]
+            all_articles = self._search_and_fetch(queries, math.ceil(max_articles / len(queries)))
+            all_articles = all_articles[:max_articles]
         
         state["news_articles"] = all_articles
         state["current_agent"] = self.name
         
-        message = f"Found {len(all_articles)} news articles for topic: {state['topic']}"
+        message = f"Found {len(all_articles)} news articles for topic: {topic}"
         state["messages"].append(self.format_message(message))
         
         return state
@@ -1,39 +1,30 @@
-from .base_agent import BaseAgent, AgentState
+from .base_agent import BaseAgent, AgentState, truncate
 from langchain_core.prompts import ChatPromptTemplate
-import json
+import orjson
+from collections import Counter
 from datetime import datetime
+from typing import Iterator
+
+# Themes listed in the detailed analysis
+TOP_THEMES_COUNT = 8
+
+# Themes and red flags included in the executive summary digest
+DIGEST_TOP_K = 5
 
 class ReportGeneratorAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, include_full_context: bool = False):
         super().__init__(
             name="ReportGenerator",
-            description="Generates comprehensive reports from analysis results"
+            description="Generates comprehensive reports from analysis results",
+            # The executive summary is long-form output and needs the larger tier
+            model="llama-3.3-70b-versatile",
+            max_tokens=1024
         )
-    
-    def generate_executive_summary(self, analysis_results: dict, topic: str) -> str:
-        """Generate executive summary"""
-        if not self.llm:
-            # Fallback when LLM is not available
-            overall_sentiment = analysis_results.get("overall_sentiment", {})
-            fact_check = analysis_results.get("fact_check", {})
-            
-            summary = f"Executive Summary for {topic}:\n\n"
-            summary += f"Analyzed {len(analysis_results.get('article_analyses', []))} articles.\n"
-            
-            if overall_sentiment:
-                dominant = max(overall_sentiment, key=overall_sentiment.get)
-                summary += f"Overall sentiment: {dominant}.\n"
-            
-            if fact_check:
-                credibility = fact_check.get("overall_credibility", 0)
-                summary += f"Average credibility score: {credibility:.2f}/1.0.\n"
-            
-            summary += f"Key themes identified: {len(analysis_results.get('key_themes', {}))}\n"
-            summary += "This analysis provides insights into current trends and public opinion."
-            
-            return summary
-        
-        prompt = ChatPromptTemplate.from_messages([
+        # Per-article analyses grow the summary prompt linearly with article
+        # count, so sending them is opt-in; the digest is enough by default
+        self.include_full_context = include_full_context
+        # Built once and reused for every report
+        self._summary_prompt = ChatPromptTemplate.from_messages([
             ("system", """Generate a professional executive summary for a news analysis report.
             Include:
             - Key findings
@@ -49,175 +40,277 @@ class ReportGeneratorAgent(BaseAgent):
             
             Generate executive summary:""")
         ])
+        self._summary_chain = self._summary_prompt | self.llm if self.llm else None
+    
+    def _top_themes(self, analysis_results: dict) -> list:
+        """(theme, count) pairs, most mentioned first"""
+        return Counter(analysis_results.get("key_themes", {})).most_common(TOP_THEMES_COUNT)
+    
+    def _summary_context(self, analysis_results: dict, top_themes: list) -> dict:
+        """Aggregate fields the executive summary draws on; per-article detail is left out"""
+        fact_check = analysis_results.get("fact_check", {})
+        context = {
+            "articles_analyzed": len(analysis_results.get("article_analyses", [])),
+            "overall_sentiment": analysis_results.get("overall_sentiment", {}),
+            "top_themes": dict(top_themes[:DIGEST_TOP_K]),
+            "entities": analysis_results.get("entities", [])[:10],
+            "summary_insights": analysis_results.get("summary_insights", "")
+        }
+        if fact_check:
+            context["fact_check"] = {
+                "overall_credibility": fact_check.get("overall_credibility"),
+                "reliability_summary": fact_check.get("reliability_summary"),
+                "common_red_flags": dict(
+                    Counter(fact_check.get("common_red_flags", {})).most_common(DIGEST_TOP_K)
+                )
+            }
+        return context
+    
+    def generate_executive_summary(self, analysis_results: dict, topic: str,
+                                   top_themes: list = None, dominant_sentiment: str = None) -> str:
+        """Generate executive summary; top themes and dominant sentiment are looked up if not given"""
+        return "".join(self.stream_executive_summary(
+            analysis_results, topic, top_themes=top_themes, dominant_sentiment=dominant_sentiment
+        ))
+    
+    def stream_executive_summary(self, analysis_results: dict, topic: str,
+                                 top_themes: list = None, dominant_sentiment: str = None) -> Iterator[str]:
+        """Yield the executive summary in chunks as the LLM produces it"""
+        if top_themes is None:
+            top_themes = self._top_themes(analysis_results)
+        if dominant_sentiment is None:
+            # Computed once by the content analyzer; absent when sentiment was off
+            dominant_sentiment = analysis_results.get("dominant_sentiment")
         
+        if not self.llm:
+            # Fallback when LLM is not available
+            fact_check = analysis_results.get("fact_check", {})
+            
+            summary = [
+                f"Executive Summary for {topic}:\n\n",
+                f"Analyzed {len(analysis_results.get('article_analyses', []))} articles.\n"
+            ]
+            
+            if dominant_sentiment is not None:
+                summary.append(f"Overall sentiment: {dominant_sentiment}.\n")
+            
+            if fact_check:
+                credibility = fact_check.get("overall_credibility", 0)
+                summary.append(f"Average credibility score: {credibility:.2f}/1.0.\n")
+            
+            summary.append(f"Key themes identified: {len(analysis_results.get('key_themes', {}))}\n")
+            summary.append("This analysis provides insights into current trends and public opinion.")
+            
+            yield "".join(summary)
+            return
+        
+        streamed = False
         try:
-            chain = prompt | self.llm
-            response = chain.invoke({
+            for chunk in self._summary_chain.stream({
                 "topic": topic,
-                "analysis_results": json.dumps(analysis_results, indent=2)
-            })
-            return response.content
+                # Compact JSON of the aggregates keeps the prompt small
+                "analysis_results": orjson.dumps(
+                    analysis_results if self.include_full_context
+                    else self._summary_context(analysis_results, top_themes),
+                    option=orjson.OPT_SORT_KEYS
+                ).decode()
+            }):
+                streamed = True
+                yield chunk.content
         except Exception as e:
             print(f"Executive summary generation failed: {e}")
-            return f"Executive Summary for {topic}: Analysis completed with limited LLM capabilities."
+            # Text already shown can't be taken back, so only an empty
+            # summary is replaced with the notice
+            if not streamed:
+                yield f"Executive Summary for {topic}: Analysis completed with limited LLM capabilities."
     
-    def generate_detailed_analysis(self, analysis_results: dict) -> str:
-        """Generate detailed analysis section"""
-        detailed_analysis = "## Detailed Analysis\n\n"
+    def generate_detailed_analysis(self, analysis_results: dict, top_themes: list = None) -> str:
+        """Generate detailed analysis section; top themes are derived if not given"""
+        # Sections are collected as parts and joined once
+        detailed_analysis = ["## Detailed Analysis\n\n"]
         
         # Sentiment Analysis
         if "overall_sentiment" in analysis_results:
             sentiment_data = analysis_results["overall_sentiment"]
             total = sum(sentiment_data.values())
             if total > 0:
-                detailed_analysis += "### Sentiment Distribution\n"
+                detailed_analysis.append("### Sentiment Distribution\n")
                 for sentiment, count in sentiment_data.items():
                     percentage = (count / total) * 100
-                    detailed_analysis += f"- {sentiment.capitalize()}: {count} articles ({percentage:.1f}%)\n"
-                detailed_analysis += "\n"
+                    detailed_analysis.append(f"- {sentiment.capitalize()}: {count} articles ({percentage:.1f}%)\n")
+                detailed_analysis.append("\n")
         
         # Key Themes
         if "key_themes" in analysis_results:
-            detailed_analysis += "### Key Themes\n"
-            themes = sorted(analysis_results["key_themes"].items(), 
-                          key=lambda x: x[1], reverse=True)
-            for theme, count in themes[:8]:
-                detailed_analysis += f"- {theme}: mentioned {count} times\n"
-            detailed_analysis += "\n"
+            detailed_analysis.append("### Key Themes\n")
+            if top_themes is None:
+                top_themes = self._top_themes(analysis_results)
+            for theme, count in top_themes:
+                detailed_analysis.append(f"- {theme}: mentioned {count} times\n")
+            detailed_analysis.append("\n")
         
         # Entity Analysis
         if "entities" in analysis_results:
-            detailed_analysis += "### Key Entities\n"
+            detailed_analysis.append("### Key Entities\n")
             entities = analysis_results["entities"][:10]
-            detailed_analysis += f"Identified entities: {', '.join(entities)}\n\n"
+            detailed_analysis.append(f"Identified entities: {', '.join(entities)}\n\n")
         
         # Fact-Check Results
         if "fact_check" in analysis_results:
             fact_check = analysis_results["fact_check"]
-            detailed_analysis += "### Credibility Assessment\n"
-            detailed_analysis += f"Overall Credibility Score: {fact_check.get('overall_credibility', 0):.2f}/1.0\n"
-            detailed_analysis += f"Assessment: {fact_check.get('reliability_summary', 'No assessment available')}\n\n"
+            detailed_analysis.append("### Credibility Assessment\n")
+            detailed_analysis.append(f"Overall Credibility Score: {fact_check.get('overall_credibility', 0):.2f}/1.0\n")
+            detailed_analysis.append(f"Assessment: {fact_check.get('reliability_summary', 'No assessment available')}\n\n")
             
             if fact_check.get("common_red_flags"):
-                detailed_analysis += "#### Common Issues Identified:\n"
+                detailed_analysis.append("#### Common Issues Identified:\n")
                 for flag, count in fact_check["common_red_flags"].items():
-                    detailed_analysis += f"- {flag}: {count} articles\n"
-                detailed_analysis += "\n"
+                    detailed_analysis.append(f"- {flag}: {count} articles\n")
+                detailed_analysis.append("\n")
         
-        return detailed_analysis
+        return "".join(detailed_analysis)
     
     def generate_article_summaries(self, articles: list, analysis_results: dict) -> str:
         """Generate individual article summaries"""
-        summaries = "## Article Summaries\n\n"
+        summaries = ["## Article Summaries\n\n"]
         
         article_analyses = analysis_results.get("article_analyses", [])
         fact_check_assessments = analysis_results.get("fact_check", {}).get("article_assessments", [])
+        num_analyses = len(article_analyses)
+        num_assessments = len(fact_check_assessments)
         
         for i, article in enumerate(articles):
-            summaries += f"### Article {i+1}: {article.get('title', 'Untitled')}\n"
-            summaries += f"**URL:** {article.get('url', 'N/A')}\n"
-            summaries += f"**Published:** {article.get('publish_date', 'Unknown')}\n\n"
+            summaries.append(f"### Article {i+1}: {article.get('title', 'Untitled')}\n")
+            summaries.append(f"**URL:** {article.get('url', 'N/A')}\n")
+            summaries.append(f"**Published:** {article.get('publish_date', 'Unknown')}\n\n")
             
-            # Add sentiment analysis if available
-            if i < len(article_analyses):
-                analysis = article_analyses[i]
-                sentiment_info = analysis.get("sentiment", {})
-                summaries += f"**Sentiment:** {sentiment_info.get('sentiment', 'Unknown')} "
-                summaries += f"(Confidence: {sentiment_info.get('confidence', 0):.2f})\n"
+            # Add sentiment analysis if available; it is empty when sentiment
+            # analysis was switched off
+            sentiment_info = article_analyses[i].get("sentiment", {}) if i < num_analyses else {}
+            if sentiment_info:
+                summaries.append(f"**Sentiment:** {sentiment_info.get('sentiment', 'Unknown')} ")
+                summaries.append(f"(Confidence: {sentiment_info.get('confidence', 0):.2f})\n")
                 
                 if sentiment_info.get("key_themes"):
-                    summaries += f"**Themes:** {', '.join(sentiment_info['key_themes'][:3])}\n"
+                    summaries.append(f"**Themes:** {', '.join(sentiment_info['key_themes'][:3])}\n")
             
             # Add credibility assessment if available
-            if i < len(fact_check_assessments):
+            if i < num_assessments:
                 fact_check = fact_check_assessments[i]
-                summaries += f"**Credibility Score:** {fact_check.get('credibility_score', 0):.2f}/1.0\n"
+                summaries.append(f"**Credibility Score:** {fact_check.get('credibility_score', 0):.2f}/1.0\n")
                 
                 if fact_check.get("red_flags"):
-                    summaries += f"**Issues:** {', '.join(fact_check['red_flags'][:2])}\n"
+                    summaries.append(f"**Issues:** {', '.join(fact_check['red_flags'][:2])}\n")
             
             # Add content preview
-            content = article.get("content", "")
-            preview = content[:200] + "..." if len(content) > 200 else content
-            summaries += f"**Preview:** {preview}\n\n"
-            summaries += "---\n\n"
+            preview = truncate(article.get("content", ""), 200)
+            summaries.append(f"**Preview:** {preview}\n\n")
+            summaries.append("---\n\n")
         
-        return summaries
+        return "".join(summaries)
     
     def execute(self, state: AgentState) -> AgentState:
-        # Ensure state has proper structure
-        state = self.ensure_state_structure(state)
+        for _ in self.execute_stream(state):
+            pass
+        return state
+    
+    def execute_stream(self, state: AgentState) -> Iterator[str]:
+        """Generate the report, yielding its text as it is produced.
         
-        if not state["analysis_results"] or not state["news_articles"]:
+        The executive summary arrives chunk by chunk from the LLM; the other
+        sections are yielded whole. Once exhausted, state holds the report.
+        """
+        # Looked up once; the sections below read them repeatedly
+        analysis_results = state["analysis_results"]
+        articles = state["news_articles"]
+        topic = state["topic"]
+        messages = state["messages"]
+        
+        if not analysis_results or not articles:
             state["current_agent"] = self.name
-            state["messages"].append(self.format_message("Insufficient data for report generation"))
-            return state
+            messages.append(self.format_message("Insufficient data for report generation"))
+            return
         
         # Generate report sections
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        report = f"# News Analysis Report: {state['topic']}\n\n"
-        report += f"**Generated:** {timestamp}\n"
-        report += f"**Articles Analyzed:** {len(state['news_articles'])}\n\n"
+        report = [
+            f"# News Analysis Report: {topic}\n\n",
+            f"**Generated:** {timestamp}\n",
+            f"**Articles Analyzed:** {len(articles)}\n\n"
+        ]
+        
+        # Ranked once and shared by every section that lists themes
+        top_themes = self._top_themes(analysis_results)
         
         # Executive Summary
-        exec_summary = self.generate_executive_summary(state["analysis_results"], state["topic"])
-        report += "## Executive Summary\n\n"
-        report += exec_summary + "\n\n"
+        report.append("## Executive Summary\n\n")
+        yield "".join(report)
+        for chunk in self.stream_executive_summary(
+            analysis_results, topic,
+            top_themes=top_themes, dominant_sentiment=analysis_results.get("dominant_sentiment")
+        ):
+            report.append(chunk)
+            yield chunk
+        streamed = len(report)
+        report.append("\n\n")
         
         # Key Findings
-        report += "## Key Findings\n\n"
-        analysis_results = state["analysis_results"]
+        report.append("## Key Findings\n\n")
         
         # Sentiment summary
         overall_sentiment = analysis_results.get("overall_sentiment", {})
         if overall_sentiment:
             total = sum(overall_sentiment.values())
             if total > 0:
-                report += "### Sentiment Analysis\n"
+                report.append("### Sentiment Analysis\n")
                 for sentiment, count in overall_sentiment.items():
                     percentage = (count / total) * 100
-                    report += f"- {sentiment.capitalize()}: {count} articles ({percentage:.1f}%)\n"
-                report += "\n"
+                    report.append(f"- {sentiment.capitalize()}: {count} articles ({percentage:.1f}%)\n")
+                report.append("\n")
         
         # Top themes
-        themes = analysis_results.get("key_themes", {})
-        if themes:
-            report += "### Top Themes\n"
-            sorted_themes = sorted(themes.items(), key=lambda x: x[1], reverse=True)[:5]
-            for theme, count in sorted_themes:
-                report += f"- {theme}: {count} mentions\n"
-            report += "\n"
+        if top_themes:
+            report.append("### Top Themes\n")
+            for theme, count in top_themes[:5]:
+                report.append(f"- {theme}: {count} mentions\n")
+            report.append("\n")
         
         # Credibility assessment
         fact_check = analysis_results.get("fact_check", {})
         if fact_check:
-            report += "### Credibility Assessment\n"
+            report.append("### Credibility Assessment\n")
             credibility = fact_check.get("overall_credibility", 0)
             reliability_summary = fact_check.get("reliability_summary", "No assessment available")
-            report += f"- Overall credibility score: {credibility:.2f}/1.0\n"
-            report += f"- Assessment: {reliability_summary}\n\n"
+            report.append(f"- Overall credibility score: {credibility:.2f}/1.0\n")
+            report.append(f"- Assessment: {reliability_summary}\n\n")
         
         # Summary insights
         summary_insights = analysis_results.get("summary_insights", "")
         if summary_insights:
-            report += "### Summary Insights\n"
-            report += summary_insights + "\n\n"
+            report.append("### Summary Insights\n")
+            report.append(summary_insights + "\n\n")
         
-        # Methodology
-        report += "## Methodology\n\n"
-        report += "This report was generated using a multi-agent AI system that:\n"
-        report += "1. Searched for relevant news articles\n"
-        report += "2. Analyzed content for sentiment, themes, and entities\n"
-        report += "3. Performed fact-checking and credibility assessment\n"
-        report += "4. Generated comprehensive analysis and insights\n\n"
+        # Methodology; only the stages that ran are listed, and themes
+        # come from the sentiment analyses
+        steps = [
+            "Searched for relevant news articles",
+            "Analyzed content for sentiment, themes, and entities" if overall_sentiment
+            else "Analyzed content for entities"
+        ]
+        if fact_check:
+            steps.append("Performed fact-checking and credibility assessment")
+        steps.append("Generated comprehensive analysis and insights")
+        report.append("## Methodology\n\nThis report was generated using a multi-agent AI system that:\n")
+        report.extend(f"{i}. {step}\n" for i, step in enumerate(steps, 1))
+        report.append(
+            "\n**Disclaimer:** This analysis is generated by AI and should be verified with additional sources.\n"
+        )
         
-        report += "**Disclaimer:** This analysis is generated by AI and should be verified with additional sources.\n"
+        yield "".join(report[streamed:])
         
-        state["final_report"] = report
+        state["final_report"] = "".join(report)
         state["current_agent"] = self.name
         
-        message = f"Comprehensive report generated for topic: {state['topic']}"
-        state["messages"].append(self.format_message(message))
-        
-        return state
+        message = f"Comprehensive report generated for topic: {topic}"
+        messages.append(self.format_message(message))
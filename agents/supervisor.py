@@ -3,76 +3,86 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
 class SupervisorAgent(BaseAgent):
+    # Routing depends only on (articles found, analysis done, report done); the
+    # normal pipeline transitions are known up front so they never need the LLM
+    _DECISION_CACHE = {
+        (False, False, False): "NewsResearcher",
+        (True, False, False): "ContentAnalyzer",
+        (True, True, False): "ReportGenerator",
+        (True, True, True): "FINISH"
+    }
+    
     def __init__(self):
         super().__init__(
             name="Supervisor",
             description="Orchestrates the multi-agent workflow for news analysis"
         )
         self.agents = ["NewsResearcher", "ContentAnalyzer", "FactChecker", "ReportGenerator"]
+        # Built once; only consulted for states outside the decision cache
+        self._routing_prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are a supervisor managing a team of AI agents for news analysis.
+            
+            Available agents:
+            - NewsResearcher: Searches and gathers relevant news articles
+            - ContentAnalyzer: Analyzes sentiment and extracts insights
+            - FactChecker: Verifies information accuracy
+            - ReportGenerator: Creates comprehensive reports
+            
+            Current state:
+            - Topic: {topic}
+            - Articles found: {articles_count}
+            - Analysis completed: {analysis_done}
+            - Report generated: {report_done}
+            
+            Determine the next agent to execute or 'FINISH' if complete.
+            Return only the agent name or 'FINISH'."""),
+            ("user", "What should be the next step?")
+        ])
+        self._routing_chain = self._routing_prompt | self.llm | StrOutputParser() if self.llm else None
+    
+    def _fallback_decision(self, articles_count: int, analysis_done: bool, report_done: bool) -> str:
+        """Rule-based routing used when the LLM is unavailable or answers off-list"""
+        if articles_count == 0:
+            return "NewsResearcher"
+        elif not analysis_done:
+            return "ContentAnalyzer"
+        elif not report_done:
+            return "ReportGenerator"
+        else:
+            return "FINISH"
     
     def execute(self, state: AgentState) -> AgentState:
-        # Ensure state has proper structure
-        state = self.ensure_state_structure(state)
-        
         articles_count = len(state["news_articles"])
         analysis_done = bool(state["analysis_results"])
         report_done = bool(state["final_report"])
+        key = (articles_count > 0, analysis_done, report_done)
         
-        if not self.llm:
-            # Simple fallback logic when LLM is not available
-            if articles_count == 0:
-                next_agent = "NewsResearcher"
-            elif not analysis_done:
-                next_agent = "ContentAnalyzer"
-            elif not report_done:
-                next_agent = "ReportGenerator"
-            else:
-                next_agent = "FINISH"
-        else:
+        next_agent = self._DECISION_CACHE.get(key)
+        if next_agent is None and not self.llm:
+            next_agent = self._fallback_decision(articles_count, analysis_done, report_done)
+        elif next_agent is None:
             try:
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", """You are a supervisor managing a team of AI agents for news analysis.
-                    
-                    Available agents:
-                    - NewsResearcher: Searches and gathers relevant news articles
-                    - ContentAnalyzer: Analyzes sentiment and extracts insights
-                    - FactChecker: Verifies information accuracy
-                    - ReportGenerator: Creates comprehensive reports
-                    
-                    Current state:
-                    - Topic: {topic}
-                    - Articles found: {articles_count}
-                    - Analysis completed: {analysis_done}
-                    - Report generated: {report_done}
-                    
-                    Determine the next agent to execute or 'FINISH' if complete.
-                    Return only the agent name or 'FINISH'."""),
-                    ("user", "What should be the next step?")
-                ])
-                
-                chain = prompt | self.llm | StrOutputParser()
-                next_agent = chain.invoke({
+                next_agent = self._routing_chain.invoke({
                     "topic": state["topic"],
                     "articles_count": articles_count,
                     "analysis_done": analysis_done,
                     "report_done": report_done
-                })
+                }).strip()
+                
+                if next_agent in self.agents or next_agent == "FINISH":
+                    # The topic doesn't change the route, so the answer holds for
+                    # every later state with the same flags
+                    self._DECISION_CACHE[key] = next_agent
+                else:
+                    next_agent = self._fallback_decision(articles_count, analysis_done, report_done)
             except Exception as e:
                 print(f"Supervisor decision failed: {e}")
-                # Fallback logic
-                if articles_count == 0:
-                    next_agent = "NewsResearcher"
-                elif not analysis_done:
-                    next_agent = "ContentAnalyzer"
-                elif not report_done:
-                    next_agent = "ReportGenerator"
-                else:
-                    next_agent = "FINISH"
+                next_agent = self._fallback_decision(articles_count, analysis_done, report_done)
         
         state["current_agent"] = self.name
-        state["next_agent"] = next_agent.strip()
+        state["next_agent"] = next_agent
         
-        message = f"Supervisor decided next agent: {state['next_agent']}"
+        message = f"Supervisor decided next agent: {next_agent}"
         state["messages"].append(self.format_message(message))
         
         return state
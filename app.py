@@ -1,13 +1,10 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-from workflow import NewsAnalysisWorkflow
-import pandas as pd
-import json
-from datetime import datetime
+import io
 import time
+import html
+from collections import Counter
+from itertools import islice
+from datetime import datetime
 
 # Page config
 st.set_page_config(
@@ -17,8 +14,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS with better colors and visibility
-st.markdown("""
+# Custom CSS with better colors and visibility; static, so built once at import
+APP_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -108,7 +105,79 @@ st.markdown("""
         text-align: center;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
+# Welcome-screen agent overview: (title, description) per agent, in row-major
+# grid order so researcher / analyzer stay in the left column
+AGENT_CARDS = (
+    ("🔍 News Researcher", "Searches and gathers relevant news articles from multiple sources using advanced web scraping and APIs. Finds the most current and relevant information."),
+    ("✅ Fact Checker", "Verifies information accuracy and identifies potential misinformation or bias. Ensures the reliability and credibility of news sources."),
+    ("📊 Content Analyzer", "Analyzes sentiment, extracts key themes, and identifies important entities in the content. Provides deep insights into the emotional tone and main topics."),
+    ("📝 Report Generator", "Creates comprehensive reports with insights, visualizations, and recommendations. Synthesizes all analysis into actionable intelligence.")
+)
+
+# Two-column grid of all cards, sent as a single markdown element
+AGENT_OVERVIEW_HTML = (
+    '<div style="display: grid; grid-template-columns: 1fr 1fr; column-gap: 1rem;">'
+    + "".join(
+        f'<div class="agent-card"><h4>{title}</h4><p>{description}</p></div>'
+        for title, description in AGENT_CARDS
+    )
+    + "</div>"
+)
+
+# Topics offered as one-click buttons on the welcome screen
+SAMPLE_TOPICS = (
+    "Artificial Intelligence", "Climate Change", "Cryptocurrency",
+    "Space Exploration", "Renewable Energy", "Global Economy"
+)
+
+@st.cache_resource
+def get_workflow():
+    """Build the workflow (agents, LLM clients, graph) once per process"""
+    # Imported here so the welcome screen doesn't wait on langgraph/langchain
+    from workflow import NewsAnalysisWorkflow
+    
+    # Safe to share across reruns and sessions: run() keeps all per-run state
+    # in a fresh state dict
+    return NewsAnalysisWorkflow()
+
+# Progress shown when each workflow stage starts
+WORKFLOW_STEPS = {
+    "news_researcher": ("🔍 Searching for news articles", 10),
+    "content_analyzer": ("📊 Analyzing content and checking facts", 40),
+    "report_generator": ("📝 Generating comprehensive report", 80)
+}
+
+# Finished results are reused across sessions for this long
+RESULTS_TTL = 3600
+
+@st.cache_resource
+def get_results_cache():
+    """Finished results by run inputs, shared across sessions as (finished at, results).
+    
+    A plain dict rather than st.cache_data: the run reports progress to
+    placeholders created outside it, which st.cache_data would try to replay
+    on a hit. Looking results up first means a hit touches no UI at all.
+    """
+    return {}
+
+def cached_results(run_key):
+    """Results of an earlier run with these inputs, or None if none finished within RESULTS_TTL"""
+    entry = get_results_cache().get(run_key)
+    if entry is not None and time.monotonic() - entry[0] < RESULTS_TTL:
+        return entry[1]
+    return None
+
+def store_results(run_key, results):
+    """Remember a run's results, dropping entries that have expired"""
+    cache = get_results_cache()
+    now = time.monotonic()
+    for key, (finished_at, _) in list(cache.items()):
+        if now - finished_at >= RESULTS_TTL:
+            cache.pop(key, None)
+    cache[run_key] = (now, results)
 
 def main():
     st.markdown('<h1 class="main-header">🤖 Multi-Agent News Analysis System</h1>', unsafe_allow_html=True)
@@ -120,6 +189,7 @@ def main():
         # Topic input
         topic = st.text_input(
             "Enter Analysis Topic",
+            key="topic",
             placeholder="e.g., Climate Change, AI Technology, Global Economy",
             help="Enter the topic you want to analyze"
         )
@@ -129,6 +199,10 @@ def main():
         max_articles = st.slider("Maximum Articles", 3, 15, 8)
         include_sentiment = st.checkbox("Include Sentiment Analysis", True)
         include_factcheck = st.checkbox("Include Fact Checking", True)
+        force_refresh = st.checkbox(
+            "Force Refresh", False,
+            help="Run the agents again instead of reusing earlier results for this topic"
+        )
         
         # Agent status
         st.subheader("🤖 Agent Status")
@@ -142,64 +216,47 @@ def main():
     
     # Main content
     if not topic:
-        st.info("👋 Welcome! Enter a topic in the sidebar to start analysis.")
-        
-        # Show agent overview with better styling
-        st.subheader("🤖 Meet Our AI Agents")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("""
-            <div class="agent-card">
-                <h4>🔍 News Researcher</h4>
-                <p>Searches and gathers relevant news articles from multiple sources using advanced web scraping and APIs. Finds the most current and relevant information.</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.markdown("""
-            <div class="agent-card">
-                <h4>📊 Content Analyzer</h4>
-                <p>Analyzes sentiment, extracts key themes, and identifies important entities in the content. Provides deep insights into the emotional tone and main topics.</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div class="agent-card">
-                <h4>✅ Fact Checker</h4>
-                <p>Verifies information accuracy and identifies potential misinformation or bias. Ensures the reliability and credibility of news sources.</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.markdown("""
-            <div class="agent-card">
-                <h4>📝 Report Generator</h4>
-                <p>Creates comprehensive reports with insights, visualizations, and recommendations. Synthesizes all analysis into actionable intelligence.</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Add sample topics
-        st.subheader("💡 Sample Topics to Try")
-        sample_topics = [
-            "Artificial Intelligence", "Climate Change", "Cryptocurrency", 
-            "Space Exploration", "Renewable Energy", "Global Economy"
-        ]
-        
-        cols = st.columns(3)
-        for i, sample_topic in enumerate(sample_topics):
-            with cols[i % 3]:
-                if st.button(f"🎯 {sample_topic}", key=f"sample_{i}"):
-                    st.session_state.sample_topic = sample_topic
-                    st.rerun()
-        
+        display_welcome()
         return
     
+    # Results already produced this session survive reruns caused by
+    # other widgets; Force Refresh makes the button analyze again
+    session_results = st.session_state.setdefault("results", {})
+    results_key = (topic, max_articles, include_sentiment, include_factcheck)
+    
     # Analysis button
-    if st.button("🚀 Start Analysis", type="primary", use_container_width=True):
-        run_analysis(topic, max_articles, include_sentiment, include_factcheck)
+    if st.button("🚀 Start Analysis", type="primary", width="stretch") and (
+            force_refresh or results_key not in session_results):
+        run_analysis(topic, max_articles, include_sentiment, include_factcheck, force_refresh)
+    elif results_key in session_results:
+        display_results(session_results[results_key], topic)
+
+def choose_sample_topic(sample_topic):
+    """Button callback filling the topic input; runs before the widget is rebuilt"""
+    st.session_state.topic = sample_topic
 
-def run_analysis(topic, max_articles, include_sentiment, include_factcheck):
+@st.fragment
+def display_welcome():
+    """Welcome screen; a fragment so its buttons don't rerun the sidebar"""
+    st.info("👋 Welcome! Enter a topic in the sidebar to start analysis.")
+    
+    # Show agent overview with better styling
+    st.subheader("🤖 Meet Our AI Agents")
+    
+    st.markdown(AGENT_OVERVIEW_HTML, unsafe_allow_html=True)
+    
+    # Add sample topics
+    st.subheader("💡 Sample Topics to Try")
+    cols = st.columns(3)
+    for i, sample_topic in enumerate(SAMPLE_TOPICS):
+        with cols[i % 3]:
+            if st.button(f"🎯 {sample_topic}", key=f"sample_{i}",
+                         on_click=choose_sample_topic, args=(sample_topic,)):
+                # The topic now fills the sidebar, so the whole page has to
+                # switch to the analysis view; nothing else reruns the app
+                st.rerun()
+
+def run_analysis(topic, max_articles, include_sentiment, include_factcheck, force_refresh=False):
     """Run the multi-agent analysis"""
     st.session_state.workflow_running = True
     
@@ -208,32 +265,29 @@ def run_analysis(topic, max_articles, include_sentiment, include_factcheck):
     status_text = st.empty()
     
     try:
-        # Initialize workflow
-        workflow = NewsAnalysisWorkflow()
-        
         # Create container for real-time updates
         update_container = st.container()
         
         with update_container:
             st.subheader(f"🔄 Analyzing: {topic}")
             
-            # Simulate workflow steps with progress updates
-            steps = [
-                ("🤖 Initializing supervisor agent", 10),
-                ("🔍 Searching for news articles", 30),
-                ("📊 Analyzing content and sentiment", 60),
-                ("✅ Fact-checking information", 80),
-                ("📝 Generating comprehensive report", 95),
-                ("✨ Finalizing results", 100)
-            ]
-            
-            for step_name, progress in steps:
-                status_text.markdown(f"**{step_name}...**")
-                progress_bar.progress(progress)
-                time.sleep(1)
-            
-            # Run actual workflow
-            results = workflow.run(topic)
+            st.session_state.partial_results = {}
+            run_key = (topic, max_articles, include_sentiment, include_factcheck)
+            results = None if force_refresh else cached_results(run_key)
+            if results is None:
+                results = run_workflow_live(run_key, progress_bar, status_text)
+                if results["error"]:
+                    # A failed run is never cached, so the next attempt runs
+                    # again; the except branch shows what finished
+                    st.session_state.partial_results = results
+                    raise RuntimeError(results["error"])
+                # Stored with the results, so a cache hit or a re-display names
+                # the download after the run that wrote the report; fixed per
+                # run so the download button stays the same widget across reruns
+                results["analysis_timestamp"] = datetime.now().strftime('%Y%m%d_%H%M%S')
+                store_results(run_key, results)
+            st.session_state.results[run_key] = results
+            progress_bar.progress(100)
         
         # Clear progress indicators
         progress_bar.empty()
@@ -248,96 +302,157 @@ def run_analysis(topic, max_articles, include_sentiment, include_factcheck):
         st.session_state.workflow_running = False
         st.error(f"❌ Analysis failed: {str(e)}")
         st.info("💡 Please check your API keys and try again.")
+        
+        # Show what the stages that finished before the failure produced
+        partial = st.session_state.get("partial_results")
+        if partial and partial.get("articles_found"):
+            display_results(partial, topic, completed=False)
+
+# Shortest gap, in seconds, between re-renders of the streaming report
+REPORT_RENDER_INTERVAL = 0.25
+
+def run_workflow_live(run_key, progress_bar, status_text):
+    """Run the workflow for run_key, showing progress and partial output while it runs.
+    
+    Only called on a cache miss; the workflow calls back on this thread,
+    outside any cached function, so every write here is a plain UI update.
+    """
+    topic, max_articles, include_sentiment, include_factcheck = run_key
+    
+    # Results of finished stages stay visible while later ones run
+    partial_view = st.empty()
+    report_view = st.empty()
+    
+    # Progress is driven by the workflow as each stage starts
+    def show_step(step, partial):
+        step_name, progress = WORKFLOW_STEPS.get(step, (step, 0))
+        status_text.markdown(f"**{step_name}...**")
+        progress_bar.progress(progress)
+        st.session_state.partial_results = partial
+        partial_view.markdown(summarize_partial_results(partial))
+    
+    # The report is shown as it is written rather than all at once; each
+    # render resends all text so far, so renders are spaced out instead of
+    # following every token
+    report_chunks = []
+    last_render = 0.0
+    def show_report_chunk(chunk):
+        nonlocal last_render
+        report_chunks.append(chunk)
+        now = time.monotonic()
+        if now - last_render >= REPORT_RENDER_INTERVAL:
+            last_render = now
+            report_view.markdown("".join(report_chunks))
+    
+    try:
+        return get_workflow().run(
+            topic, max_articles=max_articles,
+            on_step=show_step, on_report_chunk=show_report_chunk,
+            include_sentiment=include_sentiment, include_factcheck=include_factcheck
+        )
+    finally:
+        partial_view.empty()
+        report_view.empty()
+
+def summarize_partial_results(partial):
+    """One-line markdown summary of the results available so far"""
+    parts = [f"📰 Articles found: **{partial.get('articles_found', 0)}**"]
+    analysis_results = partial.get("analysis_results", {})
+    dominant_sentiment = analysis_results.get("dominant_sentiment")
+    if dominant_sentiment:
+        parts.append(f"📊 Dominant sentiment: **{dominant_sentiment.title()}**")
+    fact_check = analysis_results.get("fact_check", {})
+    if fact_check:
+        parts.append(f"✅ Credibility: **{fact_check.get('overall_credibility', 0):.2f}**")
+    return " · ".join(parts)
 
-def display_results(results, topic):
-    """Display analysis results with enhanced UI"""
-    st.success("✅ Analysis Complete!")
+def display_results(results, topic, completed=True):
+    """Display analysis results with enhanced UI; completed is False for a failed run's partial results"""
+    if completed:
+        st.success("✅ Analysis Complete!")
+    else:
+        st.warning("⚠️ Partial results: the analysis stopped before every stage finished.")
     
     # Enhanced metrics overview
     st.subheader("📊 Analysis Overview")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>{results.get("articles_found", 0)}</h3>
-            <p>Articles Analyzed</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
+    # Unpacked once; each tab gets only the fields it renders
     analysis_results = results.get("analysis_results", {})
+    sentiment_data = analysis_results.get("overall_sentiment", {})
+    themes_data = analysis_results.get("key_themes", {})
+    entities = analysis_results.get("entities", [])
+    article_analyses = analysis_results.get("article_analyses", [])
+    assessments = analysis_results.get("fact_check", {}).get("article_assessments", [])
     
-    with col2:
-        sentiment_data = analysis_results.get("overall_sentiment", {})
-        dominant_sentiment = max(sentiment_data, key=sentiment_data.get) if sentiment_data else "Unknown"
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>{dominant_sentiment.title()}</h3>
-            <p>Dominant Sentiment</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        themes_count = len(analysis_results.get("key_themes", {}))
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>{themes_count}</h3>
-            <p>Key Themes</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        entities_count = len(analysis_results.get("entities", []))
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>{entities_count}</h3>
-            <p>Entities Found</p>
-        </div>
-        """, unsafe_allow_html=True)
+    metrics = (
+        (results.get("articles_found", 0), "Articles Analyzed"),
+        (analysis_results.get("dominant_sentiment", "Unknown").title(), "Dominant Sentiment"),
+        (len(themes_data), "Key Themes"),
+        (len(entities), "Entities Found")
+    )
+    
+    # All four cards in one flex row, sent as a single markdown element
+    cards = "".join(
+        f'<div class="metric-card" style="flex: 1;"><h3>{value}</h3><p>{label}</p></div>'
+        for value, label in metrics
+    )
+    st.markdown(f'<div style="display: flex; gap: 1rem;">{cards}</div>', unsafe_allow_html=True)
     
     # Enhanced tabs
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["📋 Report", "📊 Visualizations", "🔗 Articles", "🔍 Detailed Analysis", "⚙️ Workflow Trace"])
     
+    # Each tab is a fragment fed only the slice of results it renders, so
+    # an interaction inside one tab reruns that tab alone
     with tab1:
-        display_report(results)
+        display_report(results.get("final_report", "No report generated"),
+                       results.get("analysis_timestamp", "report"))
     
     with tab2:
-        display_visualizations(analysis_results)
+        display_visualizations(sentiment_data, themes_data, assessments, entities)
     
     with tab3:
-        display_articles(results)
+        display_articles(article_analyses)
     
     with tab4:
-        display_detailed_analysis(analysis_results)
+        display_detailed_analysis(entities, article_analyses, analysis_results.get("summary_insights", ""))
     
     with tab5:
-        display_workflow_trace(results)
+        display_workflow_trace(results.get("workflow_trace", []))
 
-def display_report(results):
-    """Display the final report"""
-    report = results.get("final_report", "No report generated")
-    
-    # Download button
+@st.cache_data(show_spinner=False)
+def report_sections(report):
+    """Split the report into its preamble and (heading, body) pairs per ## section"""
+    preamble, *sections = report.split("\n## ")
+    return preamble, tuple(tuple(section.partition("\n")[::2]) for section in sections)
+
+@st.cache_data(show_spinner=False)
+def report_bytes(report):
+    """UTF-8 encoded report for the download button, encoded once per report"""
+    return report.encode("utf-8")
+
+@st.fragment
+def display_report(report, timestamp):
+    """Display the final report; timestamp names the downloaded file"""
+    # Download button; the file is only produced when it is clicked
     st.download_button(
         label="📥 Download Report",
-        data=report,
-        file_name=f"news_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
+        data=lambda: report_bytes(report),
+        file_name=f"news_analysis_{timestamp}.md",
         mime="text/markdown"
     )
     
-    # Display report
-    st.markdown(report)
+    # Display report; each section gets its own expander and only the
+    # first starts open, so the rest are not laid out on first paint
+    preamble, sections = report_sections(report)
+    st.markdown(preamble)
+    for i, (heading, body) in enumerate(sections):
+        with st.expander(heading, expanded=i == 0):
+            st.markdown(body)
 
-def display_articles(results):
+def display_articles(articles):
     """Display article links and information"""
     st.subheader("📰 Analyzed Articles")
     
-    # Get articles from results
-    articles = []
-    if 'analysis_results' in results and 'article_analyses' in results['analysis_results']:
-        articles = results['analysis_results']['article_analyses']
-    
     if not articles:
         st.info("No articles found in the analysis results.")
         return
@@ -360,18 +475,19 @@ def display_articles(results):
                 
                 st.markdown(f"**Title:** {title}")
                 
-                # Sentiment information
-                sentiment = sentiment_info.get('sentiment', 'Unknown')
-                confidence = sentiment_info.get('confidence', 0)
-                
-                # Color code sentiment
-                sentiment_color = {
-                    'positive': '🟢',
-                    'negative': '🔴', 
-                    'neutral': '🟡'
-                }.get(sentiment.lower(), '⚪')
-                
-                st.markdown(f"**Sentiment:** {sentiment_color} {sentiment.title()} (Confidence: {confidence:.2f})")
+                # Sentiment information; empty when sentiment analysis was off
+                if sentiment_info:
+                    sentiment = sentiment_info.get('sentiment', 'Unknown')
+                    confidence = sentiment_info.get('confidence', 0)
+                    
+                    # Color code sentiment
+                    sentiment_color = {
+                        'positive': '🟢',
+                        'negative': '🔴', 
+                        'neutral': '🟡'
+                    }.get(sentiment.lower(), '⚪')
+                    
+                    st.markdown(f"**Sentiment:** {sentiment_color} {sentiment.title()} (Confidence: {confidence:.2f})")
             
             with col2:
                 # Key themes
@@ -394,152 +510,208 @@ def display_articles(results):
             if summary:
                 st.markdown(f"**Summary:** {summary}")
 
-def display_visualizations(analysis_results):
+@st.cache_data(show_spinner=False)
+def render_wordcloud(theme_items):
+    """PNG bytes of a word cloud for (theme, frequency) pairs, cached per input"""
+    from wordcloud import WordCloud
+    
+    wordcloud = WordCloud(
+        width=800, height=400, background_color='white', colormap='viridis'
+    ).generate_from_frequencies(dict(theme_items))
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, 'PNG')
+    return buffer.getvalue()
+
+# Category caps for the Plotly charts; pies become unreadable and slow to
+# draw long before bars do
+MAX_PIE_SLICES = 20
+MAX_THEME_BARS = 8
+
+@st.cache_data(show_spinner=False)
+def sentiment_pie_spec(sentiment_items):
+    """Plotly figure dict for the sentiment pie, cached per (label, count) tuple"""
+    import plotly.express as px
+    
+    assert len(sentiment_items) <= MAX_PIE_SLICES, "cap pie slices before building the spec"
+    fig = px.pie(
+        values=[count for _, count in sentiment_items],
+        names=[label for label, _ in sentiment_items],
+        title="📊 Sentiment Distribution",
+        color_discrete_map={
+            'positive': '#2E8B57',
+            'negative': '#DC143C',
+            'neutral': '#FFD700'
+        }
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(
+        font=dict(size=14),
+        title_font_size=18,
+        showlegend=True
+    )
+    return fig.to_dict()
+
+@st.cache_data(show_spinner=False)
+def themes_bar_spec(theme_items):
+    """Plotly figure dict for the top-themes bar chart, cached per (theme, count) tuple"""
+    import plotly.graph_objects as go
+    
+    # Plain lists straight into the trace; no DataFrame round trip
+    themes = [theme for theme, _ in theme_items]
+    frequencies = [count for _, count in theme_items]
+    fig = go.Figure(go.Bar(
+        x=frequencies,
+        y=themes,
+        orientation='h',
+        marker=dict(color=frequencies, colorscale='Viridis', showscale=True,
+                    colorbar=dict(title='Frequency'))
+    ))
+    fig.update_layout(
+        title="🏷️ Top Themes",
+        xaxis_title='Frequency',
+        yaxis_title='Theme',
+        font=dict(size=14),
+        title_font_size=18,
+        yaxis={'categoryorder': 'total ascending'}
+    )
+    return fig.to_dict()
+
+@st.fragment
+def display_visualizations(sentiment_data, themes_data, assessments, entities):
     """Display enhanced visualizations"""
-    if not analysis_results:
+    if not (sentiment_data or themes_data or assessments or entities):
         st.info("No analysis data available for visualization.")
         return
     
+    # Charting libraries load on first use, not at app start
+    import pandas as pd
+    
     col1, col2 = st.columns(2)
     
     with col1:
         # Enhanced sentiment pie chart
-        sentiment_data = analysis_results.get("overall_sentiment", {})
         if sentiment_data:
-            fig = px.pie(
-                values=list(sentiment_data.values()),
-                names=list(sentiment_data.keys()),
-                title="📊 Sentiment Distribution",
-                color_discrete_map={
-                    'positive': '#2E8B57',
-                    'negative': '#DC143C',
-                    'neutral': '#FFD700'
-                }
+            # Tuples of items, not the dicts, so the cache can hash the input
+            st.plotly_chart(
+                sentiment_pie_spec(tuple(Counter(sentiment_data).most_common(MAX_PIE_SLICES))),
+                width="stretch"
             )
-            fig.update_traces(textposition='inside', textinfo='percent+label')
-            fig.update_layout(
-                font=dict(size=14),
-                title_font_size=18,
-                showlegend=True
-            )
-            st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Enhanced themes bar chart
-        themes_data = analysis_results.get("key_themes", {})
         if themes_data:
-            themes_df = pd.DataFrame(
-                list(themes_data.items())[:8],
-                columns=['Theme', 'Frequency']
-            )
-            fig = px.bar(
-                themes_df,
-                x='Frequency',
-                y='Theme',
-                orientation='h',
-                title="🏷️ Top Themes",
-                color='Frequency',
-                color_continuous_scale='Viridis'
-            )
-            fig.update_layout(
-                font=dict(size=14),
-                title_font_size=18,
-                yaxis={'categoryorder': 'total ascending'}
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(themes_bar_spec(tuple(Counter(themes_data).most_common(MAX_THEME_BARS))), width="stretch")
+    
+    # Per-article credibility from fact-checking; a plain bar chart needs no
+    # Plotly spec or colorbar. Numbered labels keep truncated titles distinct
+    if assessments:
+        st.subheader("✅ Article Credibility")
+        # Truncate and number the titles column-wise rather than per article
+        frame = pd.DataFrame(assessments, columns=["title", "credibility_score"])
+        titles = (
+            pd.Series(range(1, len(frame) + 1)).astype(str) + ". "
+            + frame["title"].fillna("").str.slice(0, 30) + "..."
+        )
+        st.bar_chart(
+            pd.DataFrame({"Credibility": frame["credibility_score"].fillna(0).to_numpy()}, index=titles),
+            horizontal=True
+        )
+    
+    # Theme word cloud; sorted items give a stable, hashable cache key
+    if themes_data and any(themes_data.values()):
+        st.subheader("☁️ Theme Word Cloud")
+        st.image(render_wordcloud(tuple(sorted(themes_data.items()))), width="stretch")
     
     # Enhanced entities display
-    entities = analysis_results.get("entities", [])
     if entities:
-        st.subheader("🏷️ Key Entities Found")
-        
-        # Display entities as colored tags
-        entity_html = "<div style='margin: 1rem 0;'>"
-        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD', '#98D8C8', '#F7DC6F']
-        
-        for i, entity in enumerate(entities[:15]):
-            color = colors[i % len(colors)]
-            entity_html += f'''
-            <span style="
-                background-color: {color}; 
-                color: white; 
-                padding: 0.3rem 0.8rem; 
-                margin: 0.2rem; 
-                border-radius: 20px; 
-                font-size: 0.9rem;
-                font-weight: bold;
-                display: inline-block;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            ">{entity}</span>
-            '''
-        
-        entity_html += "</div>"
-        st.markdown(entity_html, unsafe_allow_html=True)
+        render_entities("🏷️ Key Entities Found", entities, COLORED_ENTITY_TAG, ENTITY_COLORS)
+
+@st.cache_data(show_spinner=False)
+def article_analysis_frame(article_analyses):
+    """One row per analyzed article for the detailed analysis table"""
+    import pandas as pd
+    
+    # Sentiment and themes columns only when sentiment analysis ran
+    has_sentiment = any(analysis.get("sentiment") for analysis in article_analyses)
+    rows = []
+    for analysis in article_analyses:
+        row = {"Title": analysis.get("title", "Untitled")}
+        if has_sentiment:
+            sentiment = analysis.get("sentiment", {})
+            row["Sentiment"] = sentiment.get("sentiment", "Unknown")
+            row["Confidence"] = sentiment.get("confidence", 0)
+            row["Key Themes"] = ", ".join(sentiment.get("key_themes", [])[:3])
+        row["Entities"] = ", ".join(analysis.get("entities", [])[:5])
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+# Entity tags: bold colored ones in the visualizations tab, plain ones in
+# the detailed analysis tab
+MAX_ENTITY_TAGS = 15
+ENTITY_COLORS = ('#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD', '#98D8C8', '#F7DC6F')
+COLORED_ENTITY_TAG = (
+    '<span style="background-color: {color}; color: white; padding: 0.3rem 0.8rem; margin: 0.2rem; '
+    'border-radius: 20px; font-size: 0.9rem; font-weight: bold; display: inline-block; '
+    'box-shadow: 0 2px 4px rgba(0,0,0,0.1);">{entity}</span>'
+)
+ENTITY_TAG = '<span style="background-color: {color}; padding: 0.2rem 0.5rem; margin: 0.2rem; border-radius: 15px; font-size: 0.8rem;">{entity}</span>'
+
+def render_entities(heading, entities, tag, colors=("#e1f5fe",)):
+    """Subheader plus the first entities as tags, cycling through colors, in one markdown element"""
+    st.subheader(heading)
+    # Entities come from scraped text, so escape them
+    tags = "".join(
+        tag.format(color=colors[i % len(colors)], entity=html.escape(entity))
+        for i, entity in enumerate(islice(entities, MAX_ENTITY_TAGS))
+    )
+    st.markdown(f"<div style='margin: 1rem 0;'>{tags}</div>", unsafe_allow_html=True)
 
-def display_detailed_analysis(analysis_results):
+@st.fragment
+def display_detailed_analysis(entities, article_analyses, summary):
     """Display detailed analysis"""
     # Entity analysis
-    entities = analysis_results.get("entities", [])
     if entities:
-        st.subheader("🏷️ Key Entities Identified")
-        
-        # Display entities as tags
-        entity_html = ""
-        for entity in entities[:15]:
-            entity_html += f'<span style="background-color: #e1f5fe; padding: 0.2rem 0.5rem; margin: 0.2rem; border-radius: 15px; font-size: 0.8rem;">{entity}</span>'
-        
-        st.markdown(entity_html, unsafe_allow_html=True)
+        render_entities("🏷️ Key Entities Identified", entities, ENTITY_TAG)
     
     # Article-level analysis
-    article_analyses = analysis_results.get("article_analyses", [])
     if article_analyses:
         st.subheader("📄 Article-Level Analysis")
         
-        for i, analysis in enumerate(article_analyses[:5]):  # Show top 5
-            with st.expander(f"Article {i+1}: {analysis.get('title', 'Untitled')[:50]}..."):
-                sentiment = analysis.get("sentiment", {})
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write("**Sentiment:**", sentiment.get("sentiment", "Unknown"))
-                    st.write("**Confidence:**", f"{sentiment.get('confidence', 0):.2f}")
-                    
-                with col2:
-                    themes = sentiment.get("key_themes", [])
-                    if themes:
-                        st.write("**Key Themes:**", ", ".join(themes[:3]))
-                
-                entities = analysis.get("entities", [])
-                if entities:
-                    st.write("**Entities:**", ", ".join(entities[:5]))
+        # A single table instead of per-article expanders
+        st.dataframe(
+            article_analysis_frame(article_analyses),
+            width="stretch",
+            hide_index=True,
+            column_config={"Confidence": st.column_config.NumberColumn(format="%.2f")}
+        )
     
     # Summary insights
-    summary = analysis_results.get("summary_insights", "")
     if summary:
         st.subheader("💡 Summary Insights")
         st.info(summary)
 
-def display_workflow_trace(results):
+# Longest trace / message list rendered in the workflow trace tab
+MAX_TRACE_ITEMS = 50
+
+@st.cache_data(show_spinner=False)
+def trace_markdown(workflow_trace):
+    """Pre-joined markdown for (step, agent, timestamp, content) trace entries"""
+    return "\n\n".join(
+        f"**Step {step} · {agent}** ({timestamp}): {content}"
+        for step, agent, timestamp, content in islice(workflow_trace, MAX_TRACE_ITEMS)
+    )
+
+@st.fragment
+def display_workflow_trace(workflow_trace):
     """Display workflow execution trace"""
     st.subheader("🔄 Agent Workflow Trace")
     
-    workflow_trace = results.get("workflow_trace", [])
-    
-    for i, step in enumerate(workflow_trace):
-        st.write(f"**Step {i+1}:** {step}")
-    
-    # Agent messages
-    messages = results.get("messages", [])
-    if messages:
-        st.subheader("💬 Agent Communications")
-        
-        for msg in messages:
-            agent = msg.get("agent", "Unknown")
-            content = msg.get("content", "")
-            timestamp = msg.get("timestamp", "")
-            
-            st.write(f"**{agent}** ({timestamp}): {content}")
+    # One markdown element for the whole trace rather than one per step
+    if workflow_trace:
+        st.markdown(trace_markdown(tuple(
+            (entry["step"], entry["agent"], entry["timestamp"], entry["content"])
+            for entry in workflow_trace
+        )))
 
 if __name__ == "__main__":
     main()
@@ -1,32 +1,49 @@
-from langgraph.graph import StateGraph, END
 from agents.base_agent import AgentState
 from agents.supervisor import SupervisorAgent
 from agents.news_researcher import NewsResearcherAgent
 from agents.content_analyzer import ContentAnalyzerAgent
 from agents.fact_checker import FactCheckerAgent
 from agents.report_generator import ReportGeneratorAgent
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Callable
+import asyncio
+from functools import cached_property
+from datetime import datetime
 
 class NewsAnalysisWorkflow:
     def __init__(self):
-        self.supervisor = SupervisorAgent()
         self.news_researcher = NewsResearcherAgent()
         self.content_analyzer = ContentAnalyzerAgent()
         self.fact_checker = FactCheckerAgent()
         self.report_generator = ReportGeneratorAgent()
+    
+    @cached_property
+    def supervisor(self) -> SupervisorAgent:
+        """Routing agent; only the LangGraph workflow consults it"""
+        return SupervisorAgent()
+    
+    @cached_property
+    def workflow(self):
+        """The compiled LangGraph workflow, built on first use.
         
-        self.workflow = self._build_workflow()
+        run() drives the agents directly, so the compile cost is only paid
+        by callers that use the graph. Its nodes are bound to this
+        instance's agents, so it is cached per instance rather than shared.
+        """
+        return self._build_workflow()
     
-    def _build_workflow(self) -> StateGraph:
+    def _build_workflow(self):
         """Build the LangGraph workflow"""
+        # Only needed for the graph, which run() doesn't use
+        from langgraph.graph import StateGraph, END
+        
         workflow = StateGraph(AgentState)
         
-        # Add nodes - use regular execute methods instead of execute_with_state_check
-        workflow.add_node("supervisor", self.supervisor.execute)
-        workflow.add_node("news_researcher", self.news_researcher.execute)
-        workflow.add_node("content_analyzer", self.content_analyzer.execute)
-        workflow.add_node("fact_checker", self.fact_checker.execute)
-        workflow.add_node("report_generator", self.report_generator.execute)
+        # Add nodes - execute_with_state_check normalizes the state once per hop
+        workflow.add_node("supervisor", self.supervisor.execute_with_state_check)
+        workflow.add_node("news_researcher", self.news_researcher.execute_with_state_check)
+        workflow.add_node("content_analyzer", self.content_analyzer.execute_with_state_check)
+        workflow.add_node("fact_checker", self.fact_checker.execute_with_state_check)
+        workflow.add_node("report_generator", self.report_generator.execute_with_state_check)
         
         # Add edges
         workflow.set_entry_point("supervisor")
@@ -56,9 +73,97 @@ class NewsAnalysisWorkflow:
         """Route to next agent based on supervisor decision"""
         return state.get("next_agent", "FINISH")
     
-    def run(self, topic: str) -> Dict[str, Any]:
-        """Run the complete workflow"""
-        initial_state = {
+    def run(self, topic: str, max_articles: Optional[int] = None,
+            on_step: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+            on_report_chunk: Optional[Callable[[str], None]] = None,
+            include_sentiment: bool = True, include_factcheck: bool = True) -> Dict[str, Any]:
+        """Run the complete workflow, analyzing at most max_articles articles.
+        
+        include_sentiment and include_factcheck switch off sentiment
+        classification and the fact-checking stage, skipping their LLM calls.
+        
+        on_step, if given, is called with the node name of each stage just
+        before it starts, along with the results of the stages finished so
+        far, so callers can report real progress and show partial output.
+        on_report_chunk, if given, is called with each piece of the final
+        report as it is generated. Both are called on the caller's thread.
+        
+        A failed run still returns what its finished stages produced, with
+        the error message under "error"; it is None when every stage ran.
+        """
+        return asyncio.run(self.arun(topic, max_articles=max_articles, on_step=on_step,
+                                     on_report_chunk=on_report_chunk,
+                                     include_sentiment=include_sentiment,
+                                     include_factcheck=include_factcheck))
+    
+    async def _analyze_and_fact_check(self, state: AgentState, include_sentiment: bool = True,
+                                      include_factcheck: bool = True) -> AgentState:
+        """Run content analysis and, if enabled, fact-checking side by side and merge their results"""
+        # Both only read the articles, so each gets its own messages and
+        # results; the agents block on their own event loops, hence the threads
+        stages = [asyncio.to_thread(self.content_analyzer.execute_with_state_check,
+                                    {**state, "messages": [], "analysis_results": {}},
+                                    include_sentiment=include_sentiment)]
+        if include_factcheck:
+            stages.append(asyncio.to_thread(self.fact_checker.execute_with_state_check,
+                                            {**state, "messages": [], "analysis_results": {}}))
+        stage_states = await asyncio.gather(*stages)
+        
+        analysis_results = stage_states[0]["analysis_results"]
+        for stage_state in stage_states[1:]:
+            if analysis_results and "fact_check" in stage_state["analysis_results"]:
+                analysis_results["fact_check"] = stage_state["analysis_results"]["fact_check"]
+        state["analysis_results"] = analysis_results
+        for stage_state in stage_states:
+            state["messages"].extend(stage_state["messages"])
+        state["current_agent"] = stage_states[-1]["current_agent"]
+        return state
+    
+    async def _generate_report(self, state: AgentState,
+                               on_report_chunk: Optional[Callable[[str], None]]) -> AgentState:
+        """Run the report generator, handing each report chunk to on_report_chunk"""
+        if on_report_chunk is None:
+            return await asyncio.to_thread(self.report_generator.execute_with_state_check, state)
+        
+        state = self.report_generator.ensure_state_structure(state)
+        chunks = self.report_generator.execute_stream(state)
+        # Each chunk is produced off the event loop but delivered on it, so
+        # the callback runs on the same thread as on_step
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            on_report_chunk(chunk)
+        return state
+    
+    def _results(self, state: AgentState) -> Dict[str, Any]:
+        """Caller-facing results for the stages that have run on state"""
+        return {
+            "topic": state.get("topic", ""),
+            "messages": state.get("messages", []),
+            "articles_found": len(state.get("news_articles", [])),
+            "analysis_results": state.get("analysis_results", {}),
+            "final_report": state.get("final_report") or "No report generated",
+            "error": None,
+            # One structured entry per agent message, numbered in run order
+            "workflow_trace": [
+                {
+                    "step": i,
+                    "agent": msg.get("agent", "Unknown"),
+                    "content": msg.get("content", ""),
+                    "timestamp": msg.get("timestamp", "")
+                }
+                for i, msg in enumerate(state.get("messages", []), 1)
+            ]
+        }
+    
+    async def arun(self, topic: str, max_articles: Optional[int] = None,
+                   on_step: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                   on_report_chunk: Optional[Callable[[str], None]] = None,
+                   include_sentiment: bool = True, include_factcheck: bool = True) -> Dict[str, Any]:
+        """Async variant of run; content analysis and fact-checking overlap"""
+        def notify(step, state):
+            if on_step:
+                on_step(step, self._results(state))
+        
+        state = initial_state = {
             "topic": topic,
             "messages": [],
             "news_articles": [],
@@ -69,39 +174,37 @@ class NewsAnalysisWorkflow:
         }
         
         try:
-            # Simple sequential execution instead of complex workflow
+            # Simple staged execution instead of complex workflow
             print(f"Starting analysis for topic: {topic}")
             
             # Step 1: News Research
             print("Step 1: Researching news articles...")
-            state = self.news_researcher.execute(initial_state)
+            notify("news_researcher", state)
+            state = await asyncio.to_thread(self.news_researcher.execute_with_state_check, initial_state,
+                                            max_articles=max_articles)
             
-            # Step 2: Content Analysis (if articles found)
+            # Step 2: Content Analysis and Fact Checking (if articles found)
             if state["news_articles"]:
-                print("Step 2: Analyzing content...")
-                state = self.content_analyzer.execute(state)
+                print("Step 2: Analyzing content and checking facts...")
+                notify("content_analyzer", state)
+                state = await self._analyze_and_fact_check(state, include_sentiment, include_factcheck)
             
             # Step 3: Report Generation
             if state["analysis_results"]:
                 print("Step 3: Generating report...")
-                state = self.report_generator.execute(state)
+                notify("report_generator", state)
+                state = await self._generate_report(state, on_report_chunk)
             
-            return {
-                "topic": state.get("topic", topic),
-                "messages": state.get("messages", []),
-                "articles_found": len(state.get("news_articles", [])),
-                "analysis_results": state.get("analysis_results", {}),
-                "final_report": state.get("final_report", "No report generated"),
-                "workflow_trace": [msg.get("content", "") for msg in state.get("messages", [])]
-            }
+            return self._results(state)
             
         except Exception as e:
             print(f"Workflow execution failed: {e}")
-            return {
-                "topic": topic,
-                "messages": [{"agent": "System", "content": f"Workflow failed: {e}", "timestamp": ""}],
-                "articles_found": 0,
-                "analysis_results": {},
-                "final_report": f"Analysis failed for topic: {topic}. Error: {str(e)}",
-                "workflow_trace": [f"Error: {e}"]
-            }
+            # Keep whatever the finished stages produced; the failure becomes
+            # the last message, and so the last trace step
+            state["messages"] = state["messages"] + [
+                {"agent": "System", "content": f"Workflow failed: {e}", "timestamp": datetime.now().isoformat()}
+            ]
+            results = self._results(state)
+            results["final_report"] = f"Analysis failed for topic: {topic}. Error: {str(e)}"
+            results["error"] = str(e)
+            return results